@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_environment():
+    """Настройки тестов и временный MEDIA_ROOT (core.testing)."""
+    from core.testing import TestEnvironment
+
+    with TestEnvironment():
+        yield
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.queries import QueryRecorder
+from posts import counters
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}',
+                 group=cls.group if i % 2 else None)
+            for i in range(settings.POSTS_PAGE * 2 + 3)
+        )
+        counters.rebuild()
+
+    def walk(self, url, **params):
+        ids, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [post['id'] for post in data['results']]
+            pages += 1
+            if not data['next']:
+                return ids, pages, data
+            response = self.client.get(data['next'])
+
+    def test_cursor_pagination_walks_whole_feed(self):
+        """Ссылки next проходят ленту без повторов и пропусков."""
+        ids, pages, _ = self.walk(reverse('api:post_list'), fields='id')
+        expected = list(Post.objects.values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_sparse_fieldsets(self):
+        """?fields= ограничивает и ответ, и столбцы запроса."""
+        with QueryRecorder() as queries:
+            response = self.client.get(reverse('api:post_list'),
+                                       {'fields': 'id,group'})
+        first, second = response.json()['results'][:2]
+        self.assertEqual(set(first), {'id', 'group'})
+        self.assertIsNone(first['group'])
+        self.assertEqual(second['group'], {
+            'id': self.group.pk, 'slug': 'group', 'title': 'Группа'})
+        select = queries.queries[-1]['sql']
+        self.assertNotIn('"text"', select)
+        self.assertNotIn('auth_user', select)
+
+        response = self.client.get(reverse('api:post_list'),
+                                   {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(),
+                         {'detail': 'Неизвестные поля: secret'})
+
+    def test_embedded_data_is_fetched_in_one_query(self):
+        """Автор и группа приходят из того же запроса, что и посты."""
+        with QueryRecorder() as queries:
+            response = self.client.get(reverse('api:post_list'))
+        # Один запрос — метаданные для условного GET, второй — посты.
+        self.assertEqual(len(queries), 2)
+        author = response.json()['results'][0]['author']
+        self.assertEqual(author['full_name'], 'Лев Толстой')
+
+    def test_group_and_author_feeds(self):
+        """Ленты группы и автора содержат их данные и только их посты."""
+        group_url = reverse('api:group_posts', kwargs={'slug': 'group'})
+        ids, _, data = self.walk(group_url, fields='id')
+        self.assertEqual(data['group']['post_count'], len(ids))
+        self.assertCountEqual(
+            ids, Post.objects.filter(group=self.group).values_list(
+                'id', flat=True))
+        author_url = reverse('api:profile',
+                             kwargs={'username': 'author'})
+        data = self.client.get(author_url).json()
+        self.assertEqual(data['author']['post_count'],
+                         Post.objects.count())
+        for url in (reverse('api:group_posts', kwargs={'slug': 'missing'}),
+                    reverse('api:profile', kwargs={'username': 'missing'}),
+                    reverse('api:post_detail', kwargs={'post_id': 0})):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_post_detail_is_conditional(self):
+        """Пост отдаётся с ETag, повторный запрос получает 304."""
+        post = Post.objects.first()
+        url = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        response = self.client.get(url, {'fields': 'text'})
+        self.assertEqual(response.json(), {'text': post.text})
+        response = self.client.get(url, {'fields': 'text'},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
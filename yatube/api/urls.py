@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.post_list, name='post_list'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/views/', views.post_views, name='post_views'),
+    path('groups/<slug:slug>/posts/', views.group_posts, name='group_posts'),
+    path('authors/<str:username>/posts/', views.profile, name='profile'),
+]
@@ -0,0 +1,188 @@
+"""JSON API только для чтения: ленты и посты для мобильных клиентов.
+
+Посты читаются через QuerySet.values() одним запросом с JOIN автора
+и группы, без создания экземпляров моделей. Параметр ?fields= выбирает
+поля ответа, и в SELECT попадают только нужные для них столбцы.
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+from core.middleware.page_cache import add_surrogate_keys
+from posts.conditional import conditional_page, feed_state, post_state
+from posts import view_counts
+from posts.models import Group, Post, User
+from posts.utils import CursorPaginator
+
+# Поле ответа -> столбцы, которые нужно для него выбрать.
+FIELDS = {
+    'id': ('id',),
+    'text': ('text',),
+    'pub_date': ('pub_date',),
+    'updated': ('updated',),
+    'author': ('author_id', 'author__username',
+               'author__first_name', 'author__last_name'),
+    'group': ('group_id', 'group__slug', 'group__title'),
+}
+# Ключ курсора выбирается всегда, даже если его нет в ?fields=.
+CURSOR_COLUMNS = ('id', 'pub_date')
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def api_view(state):
+    """Общая обвязка представлений API.
+
+    Ответы одинаковы для всех посетителей, поэтому отвечают
+    на условные запросы без учёта пользователя; ошибки разбора
+    параметров превращаются в JSON с кодом 400.
+    """
+    def decorator(view):
+        @conditional_page(state, per_user=False)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except BadRequest as error:
+                return error_response(400, str(error))
+        return wrapper
+    return decorator
+
+
+def error_response(status, detail):
+    return JsonResponse({'detail': detail}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def json_response(data, *surrogate_keys):
+    response = JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+    return add_surrogate_keys(response, *surrogate_keys)
+
+
+def requested_fields(request):
+    value = request.GET.get('fields')
+    if not value:
+        return list(FIELDS)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(fields) - FIELDS.keys())
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def columns(fields):
+    selected = dict.fromkeys(CURSOR_COLUMNS)
+    for name in fields:
+        selected.update(dict.fromkeys(FIELDS[name]))
+    return list(selected)
+
+
+def full_name(first_name, last_name):
+    return f'{first_name} {last_name}'.strip()
+
+
+def serialize(row, fields):
+    data = {}
+    for name in fields:
+        if name == 'author':
+            data[name] = {
+                'id': row['author_id'],
+                'username': row['author__username'],
+                'full_name': full_name(row['author__first_name'],
+                                       row['author__last_name']),
+            }
+        elif name == 'group':
+            data[name] = row['group_id'] and {
+                'id': row['group_id'],
+                'slug': row['group__slug'],
+                'title': row['group__title'],
+            }
+        else:
+            data[name] = row[name]
+    return data
+
+
+def page_url(request, **params):
+    query = request.GET.copy()
+    for key in ('after', 'before'):
+        query.pop(key, None)
+    query.update(params)
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def paginated(request, posts, **extra):
+    fields = requested_fields(request)
+    paginator = CursorPaginator(posts.values(*columns(fields)),
+                                settings.POSTS_PAGE)
+    page = paginator.get_page(request.GET.get('after'),
+                              request.GET.get('before'))
+    return {
+        **extra,
+        'results': [serialize(row, fields) for row in page.object_list],
+        'next': page.next_cursor and page_url(
+            request, after=page.next_cursor),
+        'previous': page.previous_cursor and page_url(
+            request, before=page.previous_cursor),
+    }
+
+
+@api_view(feed_state)
+def post_list(request):
+    return json_response(paginated(request, Post.objects.all()), 'index')
+
+
+@api_view(feed_state)
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'id', 'slug', 'title', 'description', 'post_count').first()
+    if group is None:
+        return error_response(404, 'Группа не найдена')
+    data = paginated(request, Post.objects.filter(group_id=group['id']),
+                     group=group)
+    return json_response(data, f'group:{group["id"]}')
+
+
+@api_view(feed_state)
+def profile(request, username):
+    author = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name',
+        'stats__post_count').first()
+    if author is None:
+        return error_response(404, 'Автор не найден')
+    data = paginated(
+        request, Post.objects.filter(author_id=author['id']),
+        author={
+            'id': author['id'],
+            'username': author['username'],
+            'full_name': full_name(author['first_name'],
+                                   author['last_name']),
+            'post_count': author['stats__post_count'] or 0,
+        },
+    )
+    return json_response(data, f'author:{author["id"]}')
+
+
+@api_view(post_state)
+def post_detail(request, post_id):
+    fields = requested_fields(request)
+    row = Post.objects.filter(pk=post_id).values(*columns(fields)).first()
+    if row is None:
+        return error_response(404, 'Пост не найден')
+    keys, _ = post_state(request, post_id)
+    return json_response(serialize(row, fields), *keys)
+
+
+@never_cache
+def post_views(request, post_id):
+    """Число просмотров поста, включая ещё не сброшенные в базу.
+
+    Меняется с каждым просмотром, поэтому не кешируется и не входит
+    в ETag страницы поста: страница подгружает его отсюда.
+    """
+    views = Post.objects.filter(pk=post_id).values_list(
+        'views', flat=True).first()
+    if views is None:
+        return error_response(404, 'Пост не найден')
+    return JsonResponse({'id': post_id,
+                         'views': views + view_counts.pending(post_id)})
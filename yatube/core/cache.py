@@ -0,0 +1,34 @@
+"""Версионные ключи кеша.
+
+Вместо удаления закешированных записей у каждой области (ленты, группы,
+суррогатного ключа) хранится счётчик версии. Версия входит в ключи
+записей, поэтому инвалидация — это один incr без перебора ключей.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _initial_version():
+    # Версия, вытесненная из кеша, не должна вернуться к старому значению:
+    # иначе снова станут видны записи, сохранённые под ней.
+    return int(time.time() * 1000)
+
+
+def get_versions(keys):
+    """Возвращает словарь {ключ: версия}, создавая недостающие версии."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def bump_versions(keys):
+    """Увеличивает версии, делая устаревшими все записи с ними."""
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
@@ -0,0 +1,56 @@
+"""Маршрутизация запросов к базе между основной базой и репликами.
+
+Запись всегда идёт в основную базу ('default'). Чтение уходит в случайную
+реплику из settings.DATABASE_REPLICAS только внутри read_from_replicas():
+его включает ReplicaPinningMiddleware для безопасных запросов. Команды,
+оболочка и небезопасные запросы читают основную базу, как и чтения
+внутри транзакции: им нужны собственные несохранённые изменения.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+# Сессии определяют, кто делает запрос: их читаем только из основной базы,
+# иначе после входа пользователь на время отставания реплики «выйдет».
+PRIMARY_ONLY_APPS = ('sessions',)
+
+_state = threading.local()
+
+
+@contextmanager
+def read_from_replicas():
+    """Разрешает текущему потоку читать из реплик."""
+    previous = getattr(_state, 'replicas', False)
+    _state.replicas = True
+    try:
+        yield
+    finally:
+        _state.replicas = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not getattr(_state, 'replicas', False)
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[PRIMARY].in_atomic_block
+        ):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит вместе с данными (sync_replicas).
+        return db == PRIMARY
@@ -0,0 +1,344 @@
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookiejar import CookieJar
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            build_opener)
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connection
+from django.test import override_settings
+from django.urls import Resolver404, resolve, reverse
+
+from posts.models import Group, Post
+from yatube.wsgi import application
+
+User = get_user_model()
+
+PASSWORD = 'loadtest-password'
+DEFAULT_MIX = 'feed=60,post_detail=25,login=5,post_create=5,post_edit=5'
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class Worker(threading.Thread):
+    """Посетитель: выбирает действия по весам и замеряет каждый запрос."""
+
+    def __init__(self, command, base_url, username, deadline, seed):
+        super().__init__(daemon=True)
+        self.command = command
+        self.base_url = base_url
+        self.username = username
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies),
+                                   NoRedirect)
+        self.logged_in = False
+        self.edit_post_id = None
+        self.samples = []
+
+    def run(self):
+        actions, weights = zip(*self.command.mix.items())
+        try:
+            while time.monotonic() < self.deadline:
+                action = self.random.choices(actions, weights)[0]
+                getattr(self, f'do_{action}')()
+        finally:
+            connection.close()
+
+    def request(self, route, path, data=None):
+        body = urlencode(data).encode() if data is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, body,
+                                  timeout=30) as response:
+                status, content = response.status, response.read()
+        except HTTPError as error:
+            status, content = error.code, error.read()
+        except (URLError, OSError):
+            status, content = 0, b''
+        elapsed = (time.perf_counter() - start) * 1000
+        self.samples.append((route, status, elapsed))
+        return status, content.decode('utf-8', 'replace')
+
+    def csrf_token(self, html):
+        match = CSRF_INPUT.search(html)
+        return match.group(1) if match else ''
+
+    def do_feed(self):
+        self.request('feed', self.random.choice(self.command.feed_urls))
+
+    def do_post_detail(self):
+        post_id = self.random.choice(self.command.post_ids)
+        self.request('post_detail', reverse('posts:post_detail',
+                                            args=[post_id]))
+
+    def do_login(self):
+        self.cookies.clear()
+        _, html = self.request('login_form', reverse('users:login'))
+        status, _ = self.request('login', reverse('users:login'), {
+            'csrfmiddlewaretoken': self.csrf_token(html),
+            'username': self.username,
+            'password': PASSWORD,
+        })
+        self.logged_in = status == 302
+
+    def do_post_create(self):
+        if not self.logged_in:
+            return self.do_login()
+        _, html = self.request('post_create_form',
+                               reverse('posts:post_create'))
+        self.request('post_create', reverse('posts:post_create'), {
+            'csrfmiddlewaretoken': self.csrf_token(html),
+            'text': f'Пост нагрузочного теста {self.random.random()}',
+            'group': self.random.choice(self.command.group_ids),
+        })
+
+    def do_post_edit(self):
+        if not self.logged_in:
+            return self.do_login()
+        if self.edit_post_id is None:
+            self.edit_post_id = Post.objects.filter(
+                author__username=self.username
+            ).values_list('pk', flat=True).first()
+        if self.edit_post_id is None:
+            return self.do_post_create()
+        url = reverse('posts:post_edit', args=[self.edit_post_id])
+        _, html = self.request('post_edit_form', url)
+        self.request('post_edit', url, {
+            'csrfmiddlewaretoken': self.csrf_token(html),
+            'text': f'Правка нагрузочного теста {self.random.random()}',
+            'group': self.random.choice(self.command.group_ids),
+        })
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: поднимает yatube.wsgi.application в локальном '
+        'многопоточном сервере (или бьёт по --url) и прогоняет смесь '
+        'чтения лент, страниц постов, входа, создания и правки постов. '
+        'Печатает запросы в секунду, гистограммы задержек и ошибки '
+        'блокировки базы по маршрутам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Длительность в секундах.')
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help=f'Веса действий, по умолчанию {DEFAULT_MIX}.',
+        )
+        parser.add_argument('--users', type=int, default=20,
+                            help='Сколько пользователей для входа и записи.')
+        parser.add_argument('--url', help='Адрес уже запущенного сервера; '
+                                          'без него сервер поднимается здесь.')
+        parser.add_argument('--port', type=int, default=0)
+        parser.add_argument('--no-cache', action='store_true',
+                            help='Отключить кеш страниц и фрагментов '
+                                 '(только для встроенного сервера).')
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--show-errors', action='store_true',
+                            help='Печатать трассировки ошибок 500.')
+
+    def handle(self, *args, **options):
+        self.mix = self.parse_mix(options['mix'])
+        usernames = self.prepare_users(options['users'])
+        self.prepare_targets()
+        self.lock_errors = Counter()
+        self.errors_lock = threading.Lock()
+
+        server = None
+        base_url = options['url']
+        if base_url is None:
+            server = make_server('127.0.0.1', options['port'], application,
+                                 server_class=ThreadingWSGIServer,
+                                 handler_class=QuietHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f'http://127.0.0.1:{server.server_port}'
+            got_request_exception.connect(self.record_exception)
+            if not options['show_errors']:
+                # Ошибки считаются в отчёте, трассировки только мешают.
+                logging.getLogger('django.request').disabled = True
+        overrides = {}
+        if options['no_cache']:
+            overrides = {'FEED_CACHE_TIMEOUT': 0, 'PAGE_CACHE_TIMEOUT': 0}
+
+        self.stdout.write(f'Нагрузка на {base_url}: {options["workers"]} '
+                          f'потоков, {options["duration"]} с.')
+        try:
+            with override_settings(**overrides):
+                started = time.monotonic()
+                deadline = started + options['duration']
+                workers = [
+                    Worker(self, base_url.rstrip('/'),
+                           usernames[i % len(usernames)], deadline,
+                           options['seed'] + i)
+                    for i in range(options['workers'])
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                elapsed = time.monotonic() - started
+        finally:
+            if server is not None:
+                got_request_exception.disconnect(self.record_exception)
+                server.shutdown()
+                server.server_close()
+
+        report = self.report(workers, elapsed)
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if not hasattr(Worker, f'do_{name}'):
+                raise CommandError(f'Неизвестное действие: {name}')
+            try:
+                mix[name] = float(weight or 1)
+            except ValueError:
+                mix[name] = math.nan
+            if not 0 <= mix[name] < math.inf:
+                raise CommandError(f'Неверный вес в --mix: {part.strip()}')
+        if not any(mix.values()):
+            raise CommandError('В --mix все веса нулевые.')
+        return mix
+
+    def prepare_users(self, count):
+        password = make_password(PASSWORD)
+        usernames = [f'loadtest_{i}' for i in range(count)]
+        User.objects.bulk_create(
+            (User(username=name, password=password) for name in usernames),
+            ignore_conflicts=True,
+        )
+        User.objects.filter(username__in=usernames).update(password=password)
+        return usernames
+
+    def prepare_targets(self):
+        self.post_ids = list(
+            Post.objects.values_list('pk', flat=True)[:1000])
+        self.group_ids = list(
+            Group.objects.values_list('pk', flat=True)[:100]) or ['']
+        if not self.post_ids:
+            raise CommandError('Нет постов: сначала запустите seed_posts.')
+        slugs = Group.objects.values_list('slug', flat=True)[:50]
+        authors = User.objects.filter(
+            stats__post_count__gt=0).values_list('username', flat=True)[:50]
+        self.feed_urls = [reverse('posts:post_list')]
+        self.feed_urls += [f'{reverse("posts:post_list")}?page={page}'
+                           for page in range(2, 6)]
+        self.feed_urls += [reverse('posts:group_list', args=[slug])
+                           for slug in slugs]
+        self.feed_urls += [reverse('posts:profile', args=[username])
+                           for username in authors]
+
+    def record_exception(self, sender, request=None, **kwargs):
+        error = sys.exc_info()[1]
+        if not isinstance(error, OperationalError) or 'locked' not in str(
+                error):
+            return
+        try:
+            route = resolve(request.path_info).view_name
+        except (Resolver404, AttributeError):
+            route = 'unknown'
+        with self.errors_lock:
+            self.lock_errors[route] += 1
+
+    def report(self, workers, elapsed):
+        routes = defaultdict(list)
+        statuses = defaultdict(Counter)
+        for worker in workers:
+            for route, status, latency in worker.samples:
+                routes[route].append(latency)
+                statuses[route][status] += 1
+        total = sum(len(latencies) for latencies in routes.values())
+        rows = {}
+        for route, latencies in sorted(routes.items()):
+            histogram = dict.fromkeys(
+                [f'<={b}' for b in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}'], 0)
+            for latency in latencies:
+                bucket = next((f'<={b}' for b in BUCKETS_MS if latency <= b),
+                              f'>{BUCKETS_MS[-1]}')
+                histogram[bucket] += 1
+            rows[route] = {
+                'requests': len(latencies),
+                'rps': len(latencies) / elapsed,
+                'p50_ms': percentile(latencies, 0.5),
+                'p95_ms': percentile(latencies, 0.95),
+                'p99_ms': percentile(latencies, 0.99),
+                'max_ms': max(latencies),
+                'statuses': {str(k): v for k, v in statuses[route].items()},
+                'histogram_ms': histogram,
+            }
+        return {
+            'duration_s': elapsed,
+            'requests': total,
+            'rps': total / elapsed,
+            'routes': rows,
+            'db_lock_errors': dict(self.lock_errors),
+        }
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'Всего {report["requests"]} запросов, '
+            f'{report["rps"]:.1f} в секунду.'
+        )
+        for route, row in report['routes'].items():
+            self.stdout.write(
+                f'{route:<18} {row["requests"]:6} запр. '
+                f'{row["rps"]:7.1f}/с  p50 {row["p50_ms"]:7.1f}  '
+                f'p95 {row["p95_ms"]:7.1f}  p99 {row["p99_ms"]:7.1f} мс  '
+                f'коды {row["statuses"]}'
+            )
+            self.stdout.write('    ' + '  '.join(
+                f'{bucket}:{count}'
+                for bucket, count in row['histogram_ms'].items() if count
+            ))
+        if report['db_lock_errors']:
+            self.stdout.write(self.style.ERROR(
+                f'Ошибки блокировки базы: {report["db_lock_errors"]}'
+            ))
+        else:
+            self.stdout.write('Ошибок блокировки базы нет.')
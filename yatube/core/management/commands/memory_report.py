@@ -0,0 +1,58 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import memory
+
+
+def kib(size):
+    return f'{size / 1024:.1f} КиБ'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит замеры памяти из MEMORY_TRACE_DIR: пик и остаток памяти '
+        'по представлениям и места, где выделяется больше всего.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Только это представление.')
+        parser.add_argument('--sites', type=int, default=10,
+                            help='Сколько мест выделений показать.')
+        parser.add_argument('--dir', default=settings.MEMORY_TRACE_DIR,
+                            help='Каталог замеров.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Удалить замеры после отчёта.')
+
+    def handle(self, *args, **options):
+        directory = options['dir']
+        if not directory:
+            raise CommandError('Каталог замеров не задан: MEMORY_TRACE_DIR.')
+        records = memory.entries(directory)
+        if options['view']:
+            records = (entry for entry in records
+                       if entry['view'] == options['view'])
+        views = memory.aggregate(records)
+        if not views:
+            self.stdout.write('Замеров нет.')
+        ranked = sorted(views.items(), key=lambda item: item[1]['peak_max'],
+                        reverse=True)
+        for view, data in ranked:
+            requests = data['requests']
+            self.stdout.write(self.style.MIGRATE_HEADING(view))
+            self.stdout.write(
+                f'  запросов: {requests}, '
+                f'пик: в среднем {kib(data["peak_total"] / requests)}, '
+                f'максимум {kib(data["peak_max"])} ({data["heaviest"]}), '
+                f'остаётся: {kib(data["retained_total"] / requests)}'
+            )
+            sites = sorted(data['sites'].items(),
+                           key=lambda item: item[1][0], reverse=True)
+            for site, (size, count) in sites[:options['sites']]:
+                self.stdout.write(
+                    f'  {kib(size / requests):>12} '
+                    f'{count / requests:>8.0f} шт.  {site}')
+        if options['clear'] and os.path.isdir(directory):
+            shutil.rmtree(directory)
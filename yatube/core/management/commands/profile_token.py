@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт значение заголовка X-Profile, с которым запрос будет '
+        'профилирован (действует PROFILE_TOKEN_MAX_AGE секунд).'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.make_token())
+        self.stderr.write(
+            f'Действует {settings.PROFILE_TOKEN_MAX_AGE} с, например: '
+            f'curl -H "X-Profile: <значение>" ...')
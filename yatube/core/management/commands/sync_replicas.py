@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из DATABASE_REPLICAS. '
+        'С --interval копирует по кругу, имитируя отставание реплик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Секунд между копиями; 0 — скопировать один раз.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICAS.')
+        for alias in ('default', *settings.DATABASE_REPLICAS):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(
+                    f'{alias}: копирование файлом возможно только '
+                    f'для SQLite.')
+        while True:
+            self.sync()
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self):
+        source = sqlite3.connect(
+            connections['default'].settings_dict['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                # Резервное копирование SQLite даёт согласованный снимок
+                # даже во время записи в основную базу.
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{time.strftime("%X")} {alias}: готово')
+        finally:
+            source.close()
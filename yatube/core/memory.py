@@ -0,0 +1,136 @@
+"""Учёт выделений памяти при обработке запроса через tracemalloc.
+
+Трассируется доля settings.MEMORY_TRACE_SAMPLE_RATE запросов
+к представлениям из settings.MEMORY_TRACE_VIEWS. Для каждого такого
+запроса записываются пик выделенной памяти, сколько осталось занято
+к концу обработки (вместе с телом ответа) и места в коде, где выделено
+больше всего. Записи копятся в settings.MEMORY_TRACE_DIR по файлу JSONL
+на процесс, а команда memory_report сводит их в отчёт.
+"""
+import json
+import os
+import tracemalloc
+from collections import defaultdict
+
+from django.conf import settings
+
+# Выделения самого tracemalloc и импорта модулей к запросу не относятся.
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def traced(view_name):
+    """Включена ли трассировка для представления view_name.
+
+    В MEMORY_TRACE_VIEWS перечисляются имена маршрутов ('posts:profile')
+    или пространства имён целиком ('posts').
+    """
+    namespace = view_name.rpartition(':')[0]
+    return any(name in (view_name, namespace)
+               for name in settings.MEMORY_TRACE_VIEWS)
+
+
+class Trace:
+    """Контекстный менеджер: трассирует выделения внутри блока."""
+
+    def __init__(self, frames=1):
+        self.frames = frames
+
+    def __enter__(self):
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            self.before = None
+            tracemalloc.start(self.frames)
+        else:
+            # Трассировка уже включена (PYTHONTRACEMALLOC): считаем
+            # разницу с тем, что было выделено до запроса.
+            self.before = tracemalloc.take_snapshot().filter_traces(IGNORED)
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        # reset_peak появился в Python 3.9. Без него пик, отсчитанный
+        # от только что включённой трассировки, и так относится к запросу,
+        # а пик уже идущей трассировки мог быть набран до запроса.
+        self.peak_known = self.started
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+            self.peak_known = True
+        return self
+
+    def __exit__(self, *exc_info):
+        current, peak = tracemalloc.get_traced_memory()
+        self.retained = current - self.baseline
+        # Если пик неизвестен, оцениваем его снизу приростом за запрос.
+        self.peak = (peak - self.baseline if self.peak_known
+                     else max(self.retained, 0))
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED)
+        if self.started:
+            tracemalloc.stop()
+
+    def top_sites(self, limit):
+        """[(файл:строка, байт, выделений)] с наибольшим объёмом."""
+        if self.before is None:
+            stats = self.snapshot.statistics('lineno')
+        else:
+            stats = [stat for stat in
+                     self.snapshot.compare_to(self.before, 'lineno')
+                     if stat.size_diff > 0]
+        sites = []
+        for stat in stats[:limit]:
+            frame = stat.traceback[0]
+            size = getattr(stat, 'size_diff', stat.size)
+            count = getattr(stat, 'count_diff', stat.count)
+            sites.append((f'{frame.filename}:{frame.lineno}', size, count))
+        return sites
+
+
+def record(view, path, trace):
+    directory = settings.MEMORY_TRACE_DIR
+    os.makedirs(directory, exist_ok=True)
+    entry = {
+        'view': view,
+        'path': path,
+        'peak': trace.peak,
+        'retained': trace.retained,
+        'sites': trace.top_sites(settings.MEMORY_TRACE_SITES),
+    }
+    filename = os.path.join(directory, f'{os.getpid()}.jsonl')
+    with open(filename, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def entries(directory):
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.jsonl'):
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Строка, которую процесс не успел дописать.
+                    continue
+
+
+def aggregate(records):
+    """Сводка по представлениям: пики памяти и суммарные места выделений."""
+    views = defaultdict(lambda: {
+        'requests': 0, 'peak_total': 0, 'peak_max': 0, 'retained_total': 0,
+        'heaviest': None, 'sites': defaultdict(lambda: [0, 0]),
+    })
+    for entry in records:
+        data = views[entry['view']]
+        data['requests'] += 1
+        data['peak_total'] += entry['peak']
+        data['retained_total'] += entry['retained']
+        if entry['peak'] >= data['peak_max']:
+            data['peak_max'] = entry['peak']
+            data['heaviest'] = entry['path']
+        for site, size, count in entry['sites']:
+            data['sites'][site][0] += size
+            data['sites'][site][1] += count
+    return views
@@ -0,0 +1,231 @@
+"""Метрики производительности по представлениям.
+
+Агрегаты копятся в памяти процесса: на запрос — одна короткая блокировка
+и несколько сложений. Для нескольких процессов (воркеров) каждый
+периодически сбрасывает снимок своих агрегатов в settings.METRICS_DIR,
+а /metrics складывает снимки всех воркеров.
+
+Снимок завершившегося воркера (процесса с таким PID больше нет) забирает
+себе первый заметивший его воркер: файл удаляется, а агрегаты входят
+в снимки забравшего. Так каталог не растёт с перезапусками воркеров,
+а счётчики в сумме не уменьшаются. Поэтому METRICS_DIR должен быть
+общим только для процессов одной машины.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# Границы гистограммы длительности запроса, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TOTALS = ('duration', 'queries', 'query_seconds', 'render_seconds',
+          'response_bytes')
+
+_request = threading.local()
+
+
+def _empty_view():
+    return {
+        'statuses': defaultdict(int),
+        # Отказы контроля нагрузки по классам маршрутов.
+        'shed': defaultdict(int),
+        'buckets': [0] * (len(BUCKETS) + 1),
+        **dict.fromkeys(TOTALS, 0),
+    }
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(_empty_view)
+        # Агрегаты завершившихся воркеров, забранные этим процессом.
+        self.retired = {}
+        self.flushed = 0
+
+    def record(self, view, status, duration, queries, query_seconds,
+               render_seconds, response_bytes):
+        bucket = bisect.bisect_left(BUCKETS, duration)
+        with self.lock:
+            data = self.views[view]
+            data['statuses'][str(status)] += 1
+            data['buckets'][bucket] += 1
+            data['duration'] += duration
+            data['queries'] += queries
+            data['query_seconds'] += query_seconds
+            data['render_seconds'] += render_seconds
+            data['response_bytes'] += response_bytes
+
+    def add_response_bytes(self, view, response_bytes):
+        """Досчитывает тело потокового ответа, отданное после record()."""
+        with self.lock:
+            self.views[view]['response_bytes'] += response_bytes
+
+    def record_shed(self, view, route_class):
+        with self.lock:
+            self.views[view]['shed'][route_class] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: {**data, 'statuses': dict(data['statuses']),
+                       'shed': dict(data['shed']),
+                       'buckets': list(data['buckets'])}
+                for view, data in self.views.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+            self.retired = {}
+
+    def flush(self, force=False):
+        """Сохраняет снимок процесса в METRICS_DIR не чаще интервала."""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+                not force
+                and now - self.flushed < settings.METRICS_FLUSH_SECONDS):
+            return
+        self.flushed = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(merge([self.snapshot(), self.retired]), file)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Складывает агрегаты этого процесса со снимками остальных."""
+        snapshots = [self.snapshot(), self.retired]
+        directory = settings.METRICS_DIR
+        if not directory or not os.path.isdir(directory):
+            return merge(snapshots)
+        adopted = []
+        for name in os.listdir(directory):
+            pid = _snapshot_pid(name)
+            if pid is None or pid == os.getpid():
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, encoding='utf-8') as file:
+                    snapshot = json.load(file)
+                if not _is_alive(pid):
+                    # Забирает снимок тот, кто первым его удалил.
+                    os.remove(path)
+                    adopted.append(snapshot)
+                    continue
+            except (OSError, ValueError):
+                continue
+            snapshots.append(snapshot)
+        if adopted:
+            self.retired = merge([self.retired] + adopted)
+            self.flush(force=True)
+        return merge(snapshots + adopted)
+
+
+def _snapshot_pid(name):
+    stem, extension = os.path.splitext(name)
+    if extension != '.json' or not stem.isdigit():
+        return None
+    return int(stem)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю.
+        return True
+    return True
+
+
+def merge(snapshots):
+    total = defaultdict(_empty_view)
+    for snapshot in snapshots:
+        for view, data in snapshot.items():
+            target = total[view]
+            for status, count in data['statuses'].items():
+                target['statuses'][status] += count
+            # Снимки воркеров прежней версии отказов не содержат.
+            for route_class, count in data.get('shed', {}).items():
+                target['shed'][route_class] += count
+            for index, count in enumerate(data['buckets']):
+                target['buckets'][index] += count
+            for key in TOTALS:
+                target[key] += data[key]
+    return total
+
+
+registry = Registry()
+
+
+def start_request():
+    _request.render_seconds = 0
+
+
+def finish_request():
+    """Возвращает время отрисовки шаблонов за запрос и сбрасывает его."""
+    return _request.__dict__.pop('render_seconds', 0)
+
+
+def add_render_time(seconds):
+    if hasattr(_request, 'render_seconds'):
+        _request.render_seconds += seconds
+
+
+def _label(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def render_prometheus(views):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            labels = ','.join(f'{key}="{_label(val)}"'
+                              for key, val in labels)
+            lines.append(f'{name}{suffix}{{{labels}}} {value}')
+
+    items = sorted(views.items())
+    metric('yatube_requests_total', 'counter',
+           'Запросы по представлению и коду ответа.',
+           [('', (('view', view), ('status', status)), count)
+            for view, data in items
+            for status, count in sorted(data['statuses'].items())])
+    metric('yatube_requests_shed_total', 'counter',
+           'Запросы, отклонённые контролем нагрузки, по классу маршрута.',
+           [('', (('view', view), ('class', route_class)), count)
+            for view, data in items
+            for route_class, count in sorted(data['shed'].items())])
+    samples = []
+    for view, data in items:
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), data['buckets']):
+            cumulative += count
+            samples.append(
+                ('_bucket', (('view', view), ('le', bound)), cumulative))
+        samples.append(('_sum', (('view', view),), data['duration']))
+        samples.append(('_count', (('view', view),), cumulative))
+    metric('yatube_request_duration_seconds', 'histogram',
+           'Длительность обработки запроса.', samples)
+    for name, key, help_text in (
+        ('yatube_db_queries_total', 'queries', 'Запросы к базе.'),
+        ('yatube_db_query_seconds_total', 'query_seconds',
+         'Время запросов к базе.'),
+        ('yatube_template_render_seconds_total', 'render_seconds',
+         'Время отрисовки шаблонов.'),
+        ('yatube_response_bytes_total', 'response_bytes',
+         'Размер тел ответов.'),
+    ):
+        metric(name, 'counter', help_text,
+               [('', (('view', view),), data[key]) for view, data in items])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,103 @@
+"""Контроль нагрузки: ограничение одновременных запросов по классам.
+
+Маршруты делятся на классы (settings.ADMISSION_CLASSES: ленты, страницы
+постов, админка), все запросы с изменением данных — класс 'writes'.
+Каждому классу процесс выделяет settings.ADMISSION_LIMITS мест. Запрос,
+которому места нет, ждёт не дольше settings.ADMISSION_QUEUE_SECONDS
+и получает быстрый 503 с Retry-After: медленные запросы одного класса
+(глубокая пагинация, админка) не занимают все потоки воркера.
+Потоковый ответ держит место до своего закрытия. Отказы считаются
+в /metrics (yatube_requests_shed_total).
+"""
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from core import metrics
+from core.middleware.metrics import MetricsMiddleware
+
+WRITES = 'writes'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def release_on_close(response, slots):
+    """Освобождает место потокового ответа, когда ответ закрыт.
+
+    Тело потокового ответа (выгрузки) считается уже после выхода
+    из представления. Сервер WSGI закрывает ответ и тогда, когда клиент
+    не дочитал его; close() вызывают и обёртки потока, поэтому место
+    освобождается один раз.
+    """
+    close = response.close
+    held = [True]
+
+    def release():
+        try:
+            held.pop()
+        except IndexError:
+            return
+        slots.release()
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            release()
+
+    response.close = close_and_release
+    return response
+
+
+class AdmissionControlMiddleware:
+    """Стоит после кеша страниц: попадания в кеш дёшевы и не ограничиваются.
+
+    MetricsMiddleware стоит раньше и учитывает отказы как ответы 503.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slots = {
+            route_class: threading.BoundedSemaphore(limit)
+            for route_class, limit in settings.ADMISSION_LIMITS.items()
+            if limit
+        }
+
+    def __call__(self, request):
+        route_class = self.route_class(request)
+        slots = self.slots.get(route_class)
+        if slots is None:
+            return self.get_response(request)
+        if not slots.acquire(timeout=settings.ADMISSION_QUEUE_SECONDS):
+            metrics.registry.record_shed(
+                MetricsMiddleware.view_name(request), route_class)
+            return self.overloaded()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            slots.release()
+            raise
+        if not response.streaming:
+            slots.release()
+            return response
+        return release_on_close(response, slots)
+
+    @staticmethod
+    def route_class(request):
+        if request.method not in SAFE_METHODS:
+            return WRITES
+        view_name = MetricsMiddleware.view_name(request)
+        namespace = view_name.partition(':')[0]
+        for route_class, names in settings.ADMISSION_CLASSES.items():
+            if view_name in names or namespace in names:
+                return route_class
+        return None
+
+    @staticmethod
+    def overloaded():
+        response = HttpResponse(
+            'Сервер перегружен. Попробуйте позже.',
+            status=503, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
@@ -0,0 +1,40 @@
+"""Трассировка памяти выбранных запросов (см. core.memory)."""
+import random
+import threading
+
+from django.conf import settings
+
+from core import memory
+from core.middleware.metrics import MetricsMiddleware
+
+# tracemalloc общий на процесс и видит выделения всех потоков: пока
+# трассируется один запрос, остальные выполняются без трассировки,
+# а их выделения попадают в замер как шум.
+_lock = threading.Lock()
+
+
+class MemoryTraceMiddleware:
+    """Стоит в конце MIDDLEWARE: в замер входят представление
+    и отрисовка шаблонов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.selected(request) or not _lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            with memory.Trace(settings.MEMORY_TRACE_FRAMES) as trace:
+                response = self.get_response(request)
+        finally:
+            _lock.release()
+        memory.record(MetricsMiddleware.view_name(request),
+                      request.get_full_path(), trace)
+        return response
+
+    @staticmethod
+    def selected(request):
+        if (not settings.MEMORY_TRACE_DIR
+                or random.random() >= settings.MEMORY_TRACE_SAMPLE_RATE):
+            return False
+        return memory.traced(MetricsMiddleware.view_name(request))
@@ -0,0 +1,61 @@
+"""Сбор метрик по представлениям: длительность, SQL, шаблоны, размер."""
+import time
+
+from django.urls import Resolver404, resolve
+
+from core import metrics
+from core.queries import QueryCounter, wrap_connections
+
+
+class MetricsMiddleware:
+    """Стоит первым в MIDDLEWARE, чтобы учесть и попадания в кеш страниц."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with wrap_connections(counter):
+                response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            render_seconds = metrics.finish_request()
+        view = self.view_name(request)
+        if response.streaming:
+            # Тело ещё не отдано: его размер досчитается по мере отправки.
+            response.streaming_content = self.count_bytes(
+                response.streaming_content, view)
+            size = 0
+        else:
+            size = len(response.content)
+        metrics.registry.record(
+            view, response.status_code, duration,
+            counter.count, counter.seconds, render_seconds, size,
+        )
+        metrics.registry.flush()
+        return response
+
+    @staticmethod
+    def count_bytes(content, view):
+        sent = 0
+        try:
+            for chunk in content:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            # И при обрыве: сервер закрывает ответ, а с ним и генератор.
+            metrics.registry.add_response_bytes(view, sent)
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # Кеш страниц отвечает до разрешения URL.
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return '<unresolved>'
+        return match.view_name
@@ -0,0 +1,130 @@
+"""Кеш целых страниц для анонимных посетителей.
+
+Представления помечают ответ суррогатными ключами (заголовок
+Surrogate-Key, его же понимают CDN). В кеш вместе с ответом попадают
+версии этих ключей; purge_surrogate_keys поднимает версии, и все
+страницы с такими ключами перестают находиться. Время последнего сброса
+ключа тоже хранится: оно входит в Last-Modified страниц (last_purged),
+иначе удаление поста или переименование группы не меняло бы его.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core.cache import bump_versions, get_versions
+
+SURROGATE_HEADER = 'Surrogate-Key'
+PAGE_KEY = 'page-cache:page:{}'
+VERSION_KEY = 'page-cache:surrogate:{}'
+PURGED_KEY = 'page-cache:purged:{}'
+UNCACHEABLE_DIRECTIVES = ('private', 'no-cache', 'no-store')
+
+# Ответ отдан из кеша, представление не вызывалось: приложения, которым
+# нужно учесть запрос (например, просмотры постов), слушают этот сигнал.
+page_cache_hit = Signal(providing_args=['request', 'response'])
+
+
+def add_surrogate_keys(response, *keys):
+    """Помечает ответ ключами, по которым его можно сбросить из кеша."""
+    current = response.get(SURROGATE_HEADER, '').split()
+    response[SURROGATE_HEADER] = ' '.join(
+        current + [key for key in keys if key not in current]
+    )
+    return response
+
+
+def purge_surrogate_keys(*keys):
+    """Сбрасывает из кеша все страницы, помеченные любым из ключей."""
+    keys = set(keys)
+    bump_versions([VERSION_KEY.format(key) for key in keys])
+    purged = time.time()
+    cache.set_many({PURGED_KEY.format(key): purged for key in keys}, None)
+
+
+def last_purged(*keys):
+    """Время последнего сброса любого из ключей или None."""
+    purged = cache.get_many([PURGED_KEY.format(key) for key in keys])
+    if not purged:
+        return None
+    return datetime.fromtimestamp(max(purged.values()), timezone.utc)
+
+
+def surrogate_versions(*keys):
+    """Текущие версии ключей; меняются при каждом сбросе страниц с ними."""
+    versions = get_versions([VERSION_KEY.format(key) for key in keys])
+    return [versions[VERSION_KEY.format(key)] for key in keys]
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт анонимным посетителям закешированные страницы.
+
+    Стоит в начале MIDDLEWARE, поэтому попадание в кеш обходит сессии,
+    CSRF, аутентификацию и само представление. Запросы с cookie сессии
+    или сообщений проходят мимо кеша; в кеш попадают только ответы
+    представлений, выставивших суррогатные ключи, и только без cookie.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.bypass_cookies = (settings.SESSION_COOKIE_NAME, 'messages')
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+        key = PAGE_KEY.format(hashlib.md5(
+            request.build_absolute_uri().encode()).hexdigest())
+        entry = cache.get(key)
+        if entry is not None:
+            versions, response = entry
+            if get_versions(list(versions)) == versions:
+                response = get_conditional_response(
+                    request,
+                    etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(
+                        response.get('Last-Modified')),
+                    response=response,
+                )
+                response['X-Page-Cache'] = 'HIT'
+                page_cache_hit.send(sender=self.__class__, request=request,
+                                    response=response)
+                return response
+        response = self.get_response(request)
+        if request.method == 'GET' and self.is_cacheable_response(
+                request, response):
+            keys = response[SURROGATE_HEADER].split()
+            versions = get_versions([VERSION_KEY.format(k) for k in keys])
+            cache.set(key, (versions, response),
+                      settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    def is_cacheable_request(self, request):
+        return (
+            settings.PAGE_CACHE_TIMEOUT
+            and request.method in ('GET', 'HEAD')
+            and 'HTTP_AUTHORIZATION' not in request.META
+            and not any(name in request.COOKIES
+                        for name in self.bypass_cookies)
+        )
+
+    def is_cacheable_response(self, request, response):
+        if (
+            response.status_code != 200
+            or response.streaming
+            or not response.get(SURROGATE_HEADER)
+            or response.cookies
+            or request.META.get('CSRF_COOKIE_USED')
+        ):
+            return False
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return False
+        cache_control = response.get('Cache-Control', '')
+        return not any(directive in cache_control
+                       for directive in UNCACHEABLE_DIRECTIVES)
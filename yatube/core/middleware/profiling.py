@@ -0,0 +1,51 @@
+"""Профилирование выбранных запросов (см. core.profiling)."""
+import cProfile
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from core import profiling
+from core.middleware.metrics import MetricsMiddleware
+
+# Профилировщик в процессе может быть только один: запрос, пришедший,
+# пока профилируется другой, выполняется без профилирования.
+_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """Стоит последним в MIDDLEWARE: профиль охватывает представление
+    вместе с отрисовкой шаблонов, но не остальные middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.selected(request) or not _lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+            duration = time.perf_counter() - start
+        finally:
+            _lock.release()
+        response['X-Profile-Id'] = profiling.save(
+            profile, request, MetricsMiddleware.view_name(request),
+            response.status_code, duration,
+        )
+        return response
+
+    @staticmethod
+    def selected(request):
+        if not settings.PROFILE_DIR:
+            return False
+        token = request.META.get(profiling.HEADER)
+        if token is not None:
+            return profiling.valid_token(token)
+        return random.random() < settings.PROFILE_SAMPLE_RATE
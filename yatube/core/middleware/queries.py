@@ -0,0 +1,29 @@
+"""Поиск N+1: повторяющиеся запросы одной формы в пределах запроса."""
+from django.conf import settings
+
+from core.queries import RepeatedQueryDetector, logger, wrap_connections
+
+
+class RepeatedQueriesMiddleware:
+    """Пишет в журнал yatube.queries запросы, повторённые
+    settings.NPLUSONE_THRESHOLD раз, с шаблоном и строкой источника."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.NPLUSONE_THRESHOLD
+        if not threshold:
+            return self.get_response(request)
+        detector = RepeatedQueryDetector(threshold)
+        with wrap_connections(detector):
+            response = self.get_response(request)
+        for shape, position in detector.reports:
+            where = ('{}, строка {}'.format(*position) if position
+                     else 'вне шаблонов')
+            logger.warning(
+                'N+1 в %s %s: запрос повторён %d раз (%s): %s',
+                request.method, request.path, detector.shapes[shape],
+                where, shape,
+            )
+        return response
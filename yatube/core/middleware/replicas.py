@@ -0,0 +1,43 @@
+"""Чтение из реплик с гарантией видеть собственные записи.
+
+Безопасные запросы (GET, HEAD) читают из реплик. Небезопасные целиком
+работают с основной базой, и после успешной записи пользователь
+на settings.REPLICA_PIN_SECONDS закрепляется за ней через сессию:
+следующие страницы покажут его пост, даже если реплика ещё не догнала
+основную базу.
+"""
+import time
+
+from django.conf import settings
+
+from core.db import read_from_replicas
+
+PIN_SESSION_KEY = '_primary_pinned_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaPinningMiddleware:
+    """Стоит после SessionMiddleware: закрепление хранится в сессии."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                request.session[PIN_SESSION_KEY] = (
+                    time.time() + settings.REPLICA_PIN_SECONDS)
+            return response
+        if self.is_pinned(request):
+            return self.get_response(request)
+        with read_from_replicas():
+            return self.get_response(request)
+
+    def is_pinned(self, request):
+        # Без куки сессии не было и записи, а значит и закрепления.
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return False
+        return request.session.get(PIN_SESSION_KEY, 0) > time.time()
@@ -0,0 +1,83 @@
+"""Раздача собранной статики с заранее сжатыми копиями.
+
+Файлы берутся из STATIC_ROOT (после collectstatic). Клиенту,
+принимающему gzip, отдаётся готовая копия .gz, так что сжатие не стоит
+процессора на каждый запрос. Файлы с хешем в имени кешируются навсегда
+(immutable), остальные — на STATIC_MAX_AGE секунд.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+GZIP = re.compile(r'\bgzip\b')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class PrecompressedStaticMiddleware:
+    """Стоит в начале MIDDLEWARE: статике не нужны сессии и кеш страниц."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = self.file_path(request)
+        if path is None:
+            return self.get_response(request)
+        return self.serve(request, *path)
+
+    @staticmethod
+    def file_path(request):
+        if (request.method not in ('GET', 'HEAD') or not settings.STATIC_ROOT
+                or not request.path_info.startswith(settings.STATIC_URL)):
+            return None
+        name = posixpath.normpath(
+            request.path_info[len(settings.STATIC_URL):]).lstrip('/')
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except ValueError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        return name, path
+
+    def serve(self, request, name, path):
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                                  stat.st_mtime, stat.st_size):
+            response = HttpResponseNotModified()
+        else:
+            content_type, encoding = mimetypes.guess_type(path)
+            compressed = f'{path}.gz'
+            use_gzip = (
+                encoding is None
+                and GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+                and os.path.isfile(compressed)
+            )
+            response = FileResponse(open(compressed if use_gzip else path,
+                                         'rb'))
+            # FileResponse угадал бы тип по имени .gz.
+            response['Content-Type'] = (
+                content_type or 'application/octet-stream')
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Vary'] = 'Accept-Encoding'
+        if self.is_immutable(name):
+            response['Cache-Control'] = IMMUTABLE
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}')
+        return response
+
+    @staticmethod
+    def is_immutable(name):
+        check = getattr(staticfiles_storage, 'is_immutable', None)
+        return check is not None and check(name)
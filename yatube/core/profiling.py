@@ -0,0 +1,115 @@
+"""Выборочное профилирование запросов через cProfile.
+
+Профилируется запрос с подписанным заголовком X-Profile (значение выдаёт
+команда profile_token) или случайная доля запросов
+settings.PROFILE_SAMPLE_RATE. Результат сохраняется в settings.PROFILE_DIR
+файлом pstats и описанием запроса рядом; хранятся только
+settings.PROFILE_KEEP последних снимков.
+"""
+import json
+import os
+import pstats
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'yatube.profiling'
+TOKEN_VALUE = 'profile'
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign(TOKEN_VALUE)
+
+
+def valid_token(token):
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
+
+
+def save(profile, request, view, status, duration):
+    """Сохраняет профиль запроса и возвращает имя снимка."""
+    directory = settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:12]}'
+    profile.dump_stats(os.path.join(directory, f'{name}.prof'))
+    meta = {
+        'name': name,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': view,
+        'status': status,
+        'duration': duration,
+        'created': time.time(),
+    }
+    with open(os.path.join(directory, f'{name}.json'), 'w',
+              encoding='utf-8') as file:
+        json.dump(meta, file, ensure_ascii=False)
+    rotate(directory)
+    return name
+
+
+def _read(directory, filename):
+    try:
+        with open(os.path.join(directory, filename),
+                  encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def captures():
+    """Описания сохранённых снимков, от самых новых к старым."""
+    directory = settings.PROFILE_DIR
+    if not directory or not os.path.isdir(directory):
+        return []
+    found = (_read(directory, filename)
+             for filename in os.listdir(directory)
+             if filename.endswith('.json'))
+    return sorted((meta for meta in found if meta),
+                  key=lambda meta: meta['created'], reverse=True)
+
+
+def rotate(directory):
+    for meta in captures()[settings.PROFILE_KEEP:]:
+        for extension in ('prof', 'json'):
+            try:
+                os.remove(os.path.join(directory,
+                                       f'{meta["name"]}.{extension}'))
+            except FileNotFoundError:
+                pass
+
+
+def path(name):
+    """Путь к файлу pstats снимка или None, если снимка нет."""
+    # Имя приходит из URL: посторонние символы не должны вывести
+    # за пределы каталога профилей.
+    if not name or os.path.basename(name) != name:
+        return None
+    filename = os.path.join(settings.PROFILE_DIR, f'{name}.prof')
+    return filename if os.path.isfile(filename) else None
+
+
+def top_functions(name, limit=10):
+    """Функции снимка с наибольшим собственным временем."""
+    filename = path(name)
+    if filename is None:
+        return []
+    stats = pstats.Stats(filename).stats
+    rows = [
+        {
+            'function': pstats.func_std_string(func),
+            'calls': calls,
+            'own': own,
+            'cumulative': cumulative,
+        }
+        for func, (_, calls, own, cumulative, _) in stats.items()
+    ]
+    rows.sort(key=lambda row: row['own'], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,146 @@
+"""Запись SQL-запросов через connection.execute_wrapper.
+
+В отличие от CaptureQueriesContext не зависит от connection.queries_log,
+который Django очищает в начале каждого запроса (reset_queries), и не
+требует DEBUG.
+"""
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger('yatube.queries')
+
+# Списки IN (%s, %s, ...) разной длины — один и тот же запрос.
+IN_LIST = re.compile(r'\(%s(?:, %s)*\)')
+
+
+class QueryRecorder:
+    """Контекстный менеджер: собирает sql, params и время каждого запроса."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'time': time.perf_counter() - start,
+            })
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query['time'] for query in self.queries)
+
+
+@contextmanager
+def wrap_connections(wrapper):
+    """Подключает execute_wrapper ко всем соединениям (и к репликам)."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield wrapper
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper: только число и суммарное время запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def query_shape(sql):
+    return IN_LIST.sub('(%s...)', sql)
+
+
+def template_position():
+    """Шаблон и строка узла, который сейчас отрисовывается, или None."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                return origin.template_name or origin.name, token.lineno
+        frame = frame.f_back
+    return None
+
+
+class RepeatedQueryDetector:
+    """Находит N+1: запросы одной формы, повторённые threshold раз.
+
+    О каждой форме сообщает один раз за запрос, указывая шаблон и строку,
+    из которой выполнен повтор.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.shapes = Counter()
+        self.reports = []
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = query_shape(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold:
+            self.reports.append((shape, template_position()))
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit):
+    """Декоратор представления: не больше limit SQL-запросов на вызов."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with wrap_connections(QueryCounter()) as counter:
+                response = view(request, *args, **kwargs)
+            if counter.count > limit:
+                message = (
+                    f'{request.method} {request.path}: {counter.count} '
+                    f'SQL-запросов при бюджете {limit} ({view.__qualname__})'
+                )
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+"""Ограничение частоты запросов к тяжёлым представлениям.
+
+Лимиты задаются в settings.RATELIMITS по имени области:
+
+    RATELIMITS = {'signup': (('ip', '5/h'),)}
+
+Ключ 'ip' считает запросы с одного адреса, 'user' — от одного вошедшего
+пользователя (к анонимам не применяется). Скорость — 'число/период',
+период — s, m, h или d.
+
+Окно скользящее и приближённое: счётчики текущего и предыдущего
+фиксированных окон лежат в кеше, и оценка — текущий счётчик плюс
+доля предыдущего, которую окно ещё захватывает. Так нужны два ключа
+кеша на лимит, а не список времён запросов.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+COUNTER_KEY = 'ratelimit:{}:{}:{}:{}'
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+def client_key(request, key):
+    if key == 'ip':
+        return request.META.get('REMOTE_ADDR')
+    if key == 'user':
+        user = getattr(request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+    raise ValueError(f'Неизвестный ключ лимита: {key}')
+
+
+def retry_after(previous, current, elapsed, period, limit):
+    """Через сколько секунд оценка окна опустится ниже limit."""
+    if current < limit:
+        # Мешает только хвост предыдущего окна.
+        wait = period * (previous + current - limit + 1) / previous - elapsed
+    else:
+        # Ждать конца окна, а затем, пока из оценки не уйдёт его часть.
+        wait = period - elapsed + period * (1 - (limit - 1) / current)
+    return max(1, math.ceil(wait))
+
+
+def check(scope, request, now=None):
+    """Учитывает запрос в лимитах области scope.
+
+    Возвращает None или число секунд до следующей разрешённой попытки;
+    отклонённый запрос в счётчики не попадает.
+    """
+    now = time.time() if now is None else now
+    counted = []
+    for key, rate in settings.RATELIMITS.get(scope, ()):
+        value = client_key(request, key)
+        if value is None:
+            continue
+        limit, period = parse_rate(rate)
+        window, elapsed = divmod(now, period)
+        keys = [COUNTER_KEY.format(scope, key, value, int(window) - 1),
+                COUNTER_KEY.format(scope, key, value, int(window))]
+        counts = cache.get_many(keys)
+        previous, current = (counts.get(name, 0) for name in keys)
+        estimate = previous * (1 - elapsed / period) + current
+        if estimate >= limit:
+            return retry_after(previous, current, elapsed, period, limit)
+        counted.append((keys[1], period))
+    for name, period in counted:
+        # Счётчик живёт два окна: в следующем он станет предыдущим.
+        if not cache.add(name, 1, 2 * period):
+            try:
+                cache.incr(name)
+            except ValueError:
+                cache.set(name, 1, 2 * period)
+    return None
+
+
+def too_many_requests(seconds):
+    response = HttpResponse(
+        'Слишком много запросов. Попробуйте позже.',
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Декоратор представления: лимиты области scope из RATELIMITS.
+
+    Проверка идёт до представления, то есть до разбора формы, хеширования
+    пароля и записи в базу. Запросы других методов (показ формы)
+    не ограничиваются.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                seconds = check(scope, request)
+                if seconds is not None:
+                    return too_many_requests(seconds)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
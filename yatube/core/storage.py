@@ -0,0 +1,63 @@
+"""Хранилище статики с хешами в именах и заранее сжатыми копиями.
+
+collectstatic кладёт рядом с каждым файлом копию с хешем содержимого
+в имени (css/bootstrap.min.css -> css/bootstrap.min.1a2b3c4d5e6f.css),
+переписывает ссылки url() внутри CSS, а текстовые файлы ещё и сжимает
+в соседние .gz. Тег {% static %} выдаёт имена с хешем по манифесту,
+поэтому такие файлы можно кешировать в браузере навсегда: изменённый
+файл получит новое имя.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.functional import cached_property
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.html', '.xml',
+                '.json', '.map')
+# Сжатая копия, которая выигрывает меньше 5%, не стоит лишнего файла.
+MIN_RATIO = 0.95
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Без collectstatic (разработка, тесты) манифеста нет, и ссылки
+    # остаются исходными вместо ошибки в каждом шаблоне.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self.__dict__.pop('hashed_names', None)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            compressed = self.compress(name)
+            if compressed:
+                yield name, compressed, True
+
+    def compress(self, name):
+        """Пишет name.gz, если файл текстовый и хорошо сжимается."""
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return None
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            content = file.read()
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content) * MIN_RATIO:
+            return None
+        with open(f'{path}.gz', 'wb') as file:
+            file.write(compressed)
+        return f'{name}.gz'
+
+    @cached_property
+    def hashed_names(self):
+        return frozenset(self.hashed_files.values())
+
+    def is_immutable(self, name):
+        """Имя с хешем содержимого: файл под ним никогда не изменится."""
+        return name in self.hashed_names
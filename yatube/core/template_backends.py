@@ -0,0 +1,33 @@
+"""Шаблонный бэкенд Django с замером времени отрисовки для метрик."""
+import time
+
+from django.template.backends.django import DjangoTemplates
+
+from core import metrics
+
+
+class TimedTemplate:
+    """Обёртка шаблона бэкенда; остальные атрибуты отдаёт как есть."""
+
+    def __init__(self, template):
+        self._wrapped = template
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self._wrapped.render(context, request)
+        finally:
+            # Вложенные {% include %} отрисовываются внутри этого вызова
+            # и отдельно не считаются.
+            metrics.add_render_time(time.perf_counter() - start)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
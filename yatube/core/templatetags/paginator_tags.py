@@ -0,0 +1,54 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=2, on_ends=1):
+    """Возвращает сжатый список номеров страниц вокруг текущей.
+
+    Пропуски обозначаются None. Если пагинатор не знает числа страниц,
+    окно заканчивается на следующей странице, а за ней ставится пропуск.
+    """
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    if num_pages is None:
+        last = number + 1 if page_obj.has_next() else number
+        tail = [None] if page_obj.has_next() else []
+        pages = _window(number, last, on_each_side, on_ends, close=False)
+        return pages + tail
+    return _window(number, num_pages, on_each_side, on_ends, close=True)
+
+
+@register.simple_tag(takes_context=True)
+def query_url(context, **params):
+    """Ссылка на текущую страницу с заменёнными GET-параметрами.
+
+    Остальные параметры запроса (например, поисковая строка) сохраняются;
+    параметр со значением None удаляется.
+    """
+    query = context['request'].GET.copy()
+    for key, value in params.items():
+        query.pop(key, None)
+        if value is not None:
+            query[key] = value
+    return f'?{query.urlencode()}'
+
+
+def _window(number, last, on_each_side, on_ends, close):
+    pages = []
+    start = max(number - on_each_side, 1)
+    end = min(number + on_each_side, last)
+    if start > on_ends + 2:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(None)
+    else:
+        start = 1
+    pages.extend(range(start, end + 1))
+    if close:
+        if end < last - on_ends - 1:
+            pages.append(None)
+            pages.extend(range(last - on_ends + 1, last + 1))
+        else:
+            pages.extend(range(end + 1, last + 1))
+    return pages
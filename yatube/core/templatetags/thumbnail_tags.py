@@ -0,0 +1,18 @@
+from django import template
+
+from posts import thumbnails as post_thumbnails
+from posts.models import Post
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnails(posts, preset):
+    """Готовит post.thumbnail для поста или страницы постов.
+
+    Миниатюры всей страницы читаются из хранилища одним пакетом.
+    """
+    if isinstance(posts, Post):
+        posts = [posts]
+    post_thumbnails.attach(posts, preset)
+    return ''
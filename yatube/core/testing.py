@@ -0,0 +1,47 @@
+"""Окружение тестов: настройки, которые меняются на время прогона.
+
+Загрузки пишутся во временный MEDIA_ROOT: фабрики тестов (mixer)
+заполняют поле картинки поста, и без подмены файлы копились бы
+в каталоге media сайта. Остальные подмены — в TEST_SETTINGS.
+Для manage.py test окружение включает TEST_RUNNER, для pytest —
+conftest.py в корне репозитория.
+"""
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_SETTINGS = {
+    # Просмотры сбрасываются только явно: фоновый поток писал бы
+    # в тестовую базу мимо транзакции теста.
+    'VIEW_COUNT_FLUSH_SECONDS': 0,
+    # Представление, превысившее бюджет SQL-запросов, роняет тест.
+    'QUERY_BUDGET_STRICT': True,
+}
+
+
+class TestEnvironment:
+    """Контекстный менеджер: TEST_SETTINGS и временный MEDIA_ROOT."""
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix='yatube-media-')
+        self.settings = override_settings(MEDIA_ROOT=self.directory,
+                                          **TEST_SETTINGS)
+        self.settings.enable()
+        return self.directory
+
+    def __exit__(self, *exc_info):
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.environment = TestEnvironment()
+        self.environment.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.environment.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
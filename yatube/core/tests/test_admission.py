@@ -0,0 +1,75 @@
+import re
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.middleware.admission import AdmissionControlMiddleware
+from posts.models import Group, Post, User
+
+
+@override_settings(ADMISSION_LIMITS={'detail': 1, 'writes': 1, 'feeds': 1},
+                   ADMISSION_QUEUE_SECONDS=0.01)
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.middleware = AdmissionControlMiddleware(
+            lambda request: HttpResponse('ok'))
+        self.factory = RequestFactory()
+        self.detail = reverse('posts:post_detail', args=(1,))
+
+    def test_requests_are_classified(self):
+        route_class = AdmissionControlMiddleware.route_class
+        self.assertEqual(route_class(self.factory.get(self.detail)), 'detail')
+        self.assertEqual(route_class(self.factory.get('/')), 'feeds')
+        self.assertEqual(route_class(self.factory.get('/admin/')), 'admin')
+        self.assertEqual(route_class(self.factory.post('/admin/')), 'writes')
+        self.assertIsNone(route_class(self.factory.get('/about/author/')))
+
+    def test_excess_requests_are_shed(self):
+        """Сверх лимита класса запрос быстро получает 503 с Retry-After."""
+        self.middleware.slots['detail'].acquire()
+        response = self.middleware(self.factory.get(self.detail))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        # Другие классы заняты отдельно; классы без лимита не ограничены.
+        self.assertEqual(self.middleware(self.factory.post('/')).content,
+                         b'ok')
+        about = self.factory.get('/about/author/')
+        self.assertEqual(self.middleware(about).content, b'ok')
+        self.middleware.slots['detail'].release()
+        self.assertEqual(self.middleware(self.factory.get(self.detail))
+                         .status_code, 200)
+
+    def test_slot_is_released_on_error(self):
+        def failing(request):
+            raise ValueError
+
+        middleware = AdmissionControlMiddleware(failing)
+        with self.assertRaises(ValueError):
+            middleware(self.factory.get(self.detail))
+        self.assertTrue(middleware.slots['detail'].acquire(blocking=False))
+
+    def test_shed_requests_are_exported(self):
+        self.middleware.slots['detail'].acquire()
+        self.middleware(self.factory.get(self.detail))
+        self.middleware(self.factory.get(self.detail))
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertRegex(text, re.escape(
+            'yatube_requests_shed_total'
+            '{view="posts:post_detail",class="detail"} 2'))
+
+    def test_streaming_response_holds_slot_until_closed(self):
+        """Выгрузка держит место класса, пока тело не дочитано."""
+        user = User.objects.create_user(username='staff', is_staff=True)
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        Post.objects.create(author=user, group=group, text='Пост')
+        self.client.force_login(user)
+        url = reverse('posts:group_export', args=('group',))
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(self.client.get(url).status_code, 503)
+        self.assertIn('Пост'.encode(), b''.join(response.streaming_content))
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,18 @@
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from core.management.commands.loadtest import Command
+
+
+class ParseMixTests(SimpleTestCase):
+    def test_weights_default_to_one(self):
+        self.assertEqual(Command().parse_mix('feed=3, post_detail'),
+                         {'feed': 3.0, 'post_detail': 1.0})
+
+    def test_bad_weight_names_token(self):
+        for value in ('feed=abc', 'feed=-1', 'feed=inf', 'feed=nan'):
+            with self.subTest(value=value):
+                with self.assertRaisesMessage(CommandError, value):
+                    Command().parse_mix(f'login=1,{value}')
+        with self.assertRaises(CommandError):
+            Command().parse_mix('feed=0')
@@ -0,0 +1,68 @@
+import io
+import tempfile
+import tracemalloc
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import memory
+from posts.models import Post, User
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, MEMORY_TRACE_SAMPLE_RATE=1,
+                   MEMORY_TRACE_VIEWS=('posts:post_list', 'users'))
+class MemoryTraceTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Длинный пост ' * 5000)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = self.settings(MEMORY_TRACE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_views_are_selected_by_name_or_namespace(self):
+        self.assertTrue(memory.traced('posts:post_list'))
+        self.assertTrue(memory.traced('users:signup'))
+        self.assertFalse(memory.traced('posts:profile'))
+        self.assertFalse(memory.traced('api:post_list'))
+
+    def test_traced_requests_are_recorded(self):
+        """Пик памяти и места выделений пишутся только для выбранных
+        маршрутов."""
+        response = self.client.get(reverse('posts:post_list'))
+        self.client.get(reverse('posts:profile', args=['author']))
+        entry, = memory.entries(self.directory)
+        self.assertEqual(entry['view'], 'posts:post_list')
+        self.assertEqual(entry['path'], '/')
+        self.assertGreater(entry['peak'], len(response.content))
+        self.assertGreaterEqual(entry['peak'], entry['retained'])
+        self.assertTrue(entry['sites'])
+
+    def test_trace_without_reset_peak(self):
+        """На Python до 3.9 (без reset_peak) трассировка тоже работает."""
+        with mock.patch('core.memory.tracemalloc',
+                        mock.Mock(wraps=tracemalloc, spec=[
+                            name for name in dir(tracemalloc)
+                            if name != 'reset_peak'])):
+            with memory.Trace() as trace:
+                data = bytearray(100_000)
+        self.assertGreaterEqual(trace.peak, len(data))
+        self.assertGreaterEqual(trace.peak, trace.retained)
+
+    def test_report(self):
+        for _ in range(2):
+            self.client.get(reverse('posts:post_list'))
+        self.client.get(reverse('users:signup'))
+        out = io.StringIO()
+        call_command('memory_report', sites=3, stdout=out)
+        report = out.getvalue()
+        self.assertIn('posts:post_list\n  запросов: 2', report)
+        self.assertIn('users:signup\n  запросов: 1', report)
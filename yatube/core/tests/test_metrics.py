@@ -0,0 +1,100 @@
+import json
+import os
+import re
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Group, Post, User
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        Post.objects.create(author=user, group=group, text='Пост')
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    def sample(self, text, name, **labels):
+        labels = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(
+            rf'^{re.escape(name)}\{{{re.escape(labels)}\}} (\S+)$',
+            text, re.MULTILINE)
+        self.assertIsNotNone(match, f'{name}{{{labels}}} не найдена')
+        return float(match.group(1))
+
+    def test_views_are_measured(self):
+        """Запросы, SQL, шаблоны и размер ответа считаются по view name."""
+        self.client.get(reverse('posts:post_list'))
+        response = self.client.get(reverse('posts:post_list'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        view = 'posts:post_list'
+        self.assertEqual(self.sample(text, 'yatube_requests_total',
+                                     view=view, status=200), 2)
+        self.assertEqual(self.sample(
+            text, 'yatube_request_duration_seconds_bucket',
+            view=view, le='+Inf'), 2)
+        self.assertEqual(self.sample(
+            text, 'yatube_request_duration_seconds_count', view=view), 2)
+        self.assertGreater(
+            self.sample(text, 'yatube_db_queries_total', view=view), 0)
+        self.assertGreater(self.sample(
+            text, 'yatube_template_render_seconds_total', view=view), 0)
+        self.assertEqual(
+            self.sample(text, 'yatube_response_bytes_total', view=view),
+            2 * len(response.content))
+
+    def test_worker_snapshots_are_merged(self):
+        """/metrics складывает снимки других воркеров со своими."""
+        self.client.get(reverse('posts:post_list'))
+        with tempfile.TemporaryDirectory() as directory:
+            other = metrics.Registry()
+            other.record('posts:post_list', 200, 0.02, 3, 0.01, 0.005, 100)
+            with open(os.path.join(directory, '999999.json'), 'w') as file:
+                json.dump(other.snapshot(), file)
+            with self.settings(METRICS_DIR=directory):
+                text = self.client.get(reverse('metrics')).content.decode()
+        self.assertEqual(self.sample(text, 'yatube_requests_total',
+                                     view='posts:post_list', status=200), 2)
+
+    def test_dead_worker_snapshot_is_adopted(self):
+        """Снимок завершившегося воркера удаляется, но его счётчики
+        остаются в сумме."""
+        dead = metrics.Registry()
+        dead.record('posts:post_list', 200, 0.02, 3, 0.01, 0.005, 100)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '999999.json')
+            with open(path, 'w') as file:
+                json.dump(dead.snapshot(), file)
+            with self.settings(METRICS_DIR=directory), \
+                    mock.patch('core.metrics._is_alive', return_value=False):
+                self.client.get(reverse('metrics'))
+                self.assertFalse(os.path.exists(path))
+                text = self.client.get(reverse('metrics')).content.decode()
+        self.assertEqual(self.sample(text, 'yatube_requests_total',
+                                     view='posts:post_list', status=200), 1)
+
+    def test_streaming_body_is_counted_when_sent(self):
+        user = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(user)
+        response = self.client.get(reverse('posts:group_export',
+                                           args=('group',)))
+        body = b''.join(response.streaming_content)
+        response.close()
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertEqual(self.sample(text, 'yatube_response_bytes_total',
+                                     view='posts:group_export'), len(body))
+
+    def test_metrics_are_not_public(self):
+        response = self.client.get(reverse('metrics'),
+                                   REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:post_list'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def test_anonymous_pages_are_cached(self):
+        """Повторный запрос анонима отдаётся из кеша."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url)['X-Page-Cache'],
+                                 'MISS')
+                self.assertEqual(self.client.get(url)['X-Page-Cache'],
+                                 'HIT')
+
+    def test_cached_page_answers_conditional_request(self):
+        """Попадание в кеш учитывает If-None-Match закешированного ответа."""
+        url = reverse('posts:post_list_rss')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+    def test_post_write_purges_affected_pages(self):
+        """Изменение поста сбрасывает страницы с его ключами."""
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Описание',
+        )
+        other_url = reverse('posts:group_list',
+                            kwargs={'slug': other_group.slug})
+        for url in self.urls + (other_url,):
+            self.client.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+                self.assertContains(response, 'Исправленный пост')
+        self.assertEqual(self.client.get(other_url)['X-Page-Cache'], 'HIT')
+
+    def test_logged_in_and_csrf_pages_bypass_cache(self):
+        """Страницы пользователей и страницы с CSRF-токеном не кешируются."""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for client, url in ((authorized_client, self.urls[0]),
+                            (self.client, reverse('users:login'))):
+            with self.subTest(url=url):
+                client.get(url)
+                self.assertNotIn('X-Page-Cache', client.get(url))
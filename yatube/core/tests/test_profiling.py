@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import Post, User
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, PROFILE_SAMPLE_RATE=0)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Пост')
+        cls.staff = User.objects.create_user(username='staff',
+                                             is_staff=True)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = self.settings(PROFILE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_signed_header_enables_profiling(self):
+        """Запрос с подписанным заголовком профилируется целиком."""
+        response = self.client.get(reverse('posts:post_list'),
+                                   HTTP_X_PROFILE=profiling.make_token())
+        name = response['X-Profile-Id']
+        self.assertEqual(self.files(), [f'{name}.json', f'{name}.prof'])
+        meta, = profiling.captures()
+        self.assertEqual(meta['view'], 'posts:post_list')
+        self.assertEqual(meta['status'], 200)
+        functions = [row['function']
+                     for row in profiling.top_functions(name, limit=None)]
+        self.assertTrue(any('render' in function for function in functions))
+
+    def test_unsigned_requests_are_not_profiled(self):
+        self.client.get(reverse('posts:post_list'))
+        response = self.client.get(reverse('posts:post_list'),
+                                   HTTP_X_PROFILE='profile:forged')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self.files(), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_KEEP=2)
+    def test_sampled_profiles_are_rotated(self):
+        """Хранятся только PROFILE_KEEP последних снимков."""
+        for _ in range(3):
+            self.client.get(reverse('posts:post_list'))
+        self.assertEqual(len(self.files()), 4)
+
+    def test_staff_page(self):
+        """Страница профилей и файлы pstats доступны только сотрудникам."""
+        name = self.client.get(
+            reverse('posts:post_list'),
+            HTTP_X_PROFILE=profiling.make_token())['X-Profile-Id']
+        urls = (reverse('profiles'), reverse('profile_download', args=[name]))
+        self.client.force_login(self.author)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertRedirects(
+                    response, f'{reverse("admin:login")}?next={url}')
+        self.client.force_login(self.staff)
+        response = self.client.get(urls[0])
+        self.assertContains(response, f'{name}.prof')
+        self.assertEqual(len(response.context['captures'][0]['functions']),
+                         10)
+        response = self.client.get(urls[1])
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(
+            self.client.get(reverse('profile_download',
+                                    args=['missing'])).status_code, 404)
@@ -0,0 +1,62 @@
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware.queries import RepeatedQueriesMiddleware
+from core.queries import QueryBudgetExceeded, query_budget
+from posts.models import Post, User
+
+TEMPLATE = '''<ul>
+{% for post in posts %}
+  <li>{{ post.author.username }}</li>
+{% endfor %}
+</ul>'''
+
+
+@override_settings(NPLUSONE_THRESHOLD=3)
+class QueryInspectionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(4):
+            user = User.objects.create_user(username=f'user{number}')
+            Post.objects.create(author=user, text='Пост')
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def render(self, posts):
+        template = engines.all()[0].from_string(TEMPLATE)
+        return HttpResponse(template.render({'posts': posts}))
+
+    def test_repeated_queries_are_logged_with_template_line(self):
+        """Повторяющийся запрос попадает в журнал со строкой шаблона."""
+        middleware = RepeatedQueriesMiddleware(
+            lambda request: self.render(Post.objects.all()))
+        with self.assertLogs('yatube.queries', 'WARNING') as logs:
+            middleware(self.request)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('повторён 4 раз', logs.output[0])
+        self.assertIn('строка 3', logs.output[0])
+        self.assertIn('auth_user', logs.output[0])
+
+    def test_joined_queries_are_not_reported(self):
+        middleware = RepeatedQueriesMiddleware(
+            lambda request: self.render(
+                Post.objects.select_related('author')))
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.queries', 'WARNING'):
+                middleware(self.request)
+
+    def test_query_budget(self):
+        """Превышение бюджета — ошибка в тестах и запись в журнал иначе."""
+        @query_budget(2)
+        def view(request):
+            return self.render(Post.objects.all())
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(self.request)
+        with self.settings(QUERY_BUDGET_STRICT=False):
+            with self.assertLogs('yatube.queries', 'WARNING') as logs:
+                view(self.request)
+        self.assertIn('5 SQL-запросов при бюджете 2', logs.output[0])
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import ratelimit
+
+User = get_user_model()
+
+
+@override_settings(RATELIMITS={
+    'test': (('ip', '2/m'),),
+    'login': (('ip', '2/m'),),
+    'post_create': (('user', '1/m'), ('ip', '100/m')),
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/')
+
+    def test_window_slides_over_previous_counts(self):
+        """Запросы конца прошлого окна ещё учитываются в начале нового."""
+        self.assertIsNone(ratelimit.check('test', self.request, now=50))
+        self.assertIsNone(ratelimit.check('test', self.request, now=55))
+        # Ждать до середины следующего окна: тогда от этого останется 1.
+        self.assertEqual(ratelimit.check('test', self.request, now=59), 31)
+        # От прошлого окна осталось 2 * 50 / 60, плюс этот запрос.
+        self.assertIsNone(ratelimit.check('test', self.request, now=70))
+        self.assertEqual(ratelimit.check('test', self.request, now=70), 50)
+        self.assertIsNone(ratelimit.check('test', self.request, now=120))
+
+    def test_rejected_requests_are_not_counted(self):
+        for _ in range(5):
+            ratelimit.check('test', self.request, now=0)
+        self.assertIsNone(ratelimit.check('test', self.request, now=90))
+
+    def test_other_ip_has_own_limit(self):
+        ratelimit.check('test', self.request, now=0)
+        ratelimit.check('test', self.request, now=0)
+        other = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        self.assertIsNone(ratelimit.check('test', other, now=0))
+
+    def test_login_is_throttled_before_form(self):
+        url = reverse('users:login')
+        data = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, data).status_code, 200)
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_post_create_is_limited_per_user(self):
+        user = User.objects.create_user(username='auth')
+        self.client.force_login(user)
+        url = reverse('posts:post_create')
+        self.client.post(url, {'text': 'Первый'})
+        with self.assertNumQueries(2):
+            # Сессия и пользователь; до формы и записи дело не доходит.
+            response = self.client.post(url, {'text': 'Второй'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Post.objects.count(), 1)
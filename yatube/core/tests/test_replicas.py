@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.db import ReplicaRouter, read_from_replicas
+from core.middleware.replicas import (PIN_SESSION_KEY,
+                                      ReplicaPinningMiddleware)
+from posts.models import Post
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    # Без обёртки TestCase в транзакцию: маршрутизатор её учитывает.
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replicas_only_when_allowed(self):
+        """Реплики читаются только внутри read_from_replicas()."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with read_from_replicas():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    def test_reads_inside_transaction_use_primary(self):
+        """Внутри транзакции чтение видит её собственные записи."""
+        with read_from_replicas():
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=10)
+class ReplicaPinningMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.session = SessionStore()
+        self.routes = []
+
+    def view(self, status):
+        def get_response(request):
+            self.routes.append(ReplicaRouter().db_for_read(Post))
+            return HttpResponse(status=status)
+        return get_response
+
+    def call(self, method, status=200):
+        request = getattr(self.factory, method)('/')
+        request.session = self.session
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'key'
+        return ReplicaPinningMiddleware(self.view(status))(request)
+
+    def test_write_pins_user_to_primary(self):
+        """После успешной записи чтения идут в основную базу."""
+        self.call('get')
+        self.call('post', status=302)
+        self.assertGreater(self.session[PIN_SESSION_KEY], time.time())
+        self.call('get')
+        self.session[PIN_SESSION_KEY] = time.time() - 1
+        self.call('get')
+        self.assertEqual(self.routes,
+                         ['replica', 'default', 'default', 'replica'])
+
+    def test_failed_write_does_not_pin(self):
+        self.call('post', status=403)
+        self.assertNotIn(PIN_SESSION_KEY, self.session)
@@ -0,0 +1,81 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.static_settings = override_settings(STATIC_ROOT=cls.static_root)
+        cls.static_settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_css = staticfiles_storage.stored_name(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.static_settings.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def source(self, name):
+        with open(os.path.join(self.static_root, name), 'rb') as file:
+            return file.read()
+
+    def get(self, name, **headers):
+        response = self.client.get(f'/static/{name}', **headers)
+        body = b''.join(response.streaming_content)
+        response.close()
+        return response, body
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.hashed_css,
+                         r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        self.assertEqual(gzip.decompress(self.source(f'{self.hashed_css}.gz')),
+                         self.source(self.hashed_css))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.static_root, 'img/logo.png.gz')))
+
+    def test_templates_link_hashed_names(self):
+        response = self.client.get(reverse('posts:post_list'))
+        self.assertContains(response, f'/static/{self.hashed_css}')
+        self.assertContains(
+            response, staticfiles_storage.url('img/fav/favicon.ico'))
+
+    def test_precompressed_copy_is_served(self):
+        """Клиенту с gzip отдаётся готовая копия, хеш — навсегда в кеш."""
+        response, body = self.get(self.hashed_css,
+                                  HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(body), self.source(self.hashed_css))
+
+        response, body = self.get(self.hashed_css)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(body, self.source(self.hashed_css))
+
+    def test_unhashed_names_are_revalidated(self):
+        response, _ = self.get(CSS, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        response = self.client.get(
+            f'/static/{CSS}',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_outside_static_root_is_not_served(self):
+        for name in ('../manage.py', '..%2Fmanage.py', 'missing.css'):
+            with self.subTest(name=name):
+                response = self.client.get(f'/static/{name}')
+                self.assertNotEqual(response.status_code, 200)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseForbidden)
+from django.shortcuts import render
+
+from core import metrics, profiling
+
+
+def prometheus_metrics(request):
+    """Метрики всех воркеров в текстовом формате Prometheus."""
+    if (request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+            and not request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render_prometheus(metrics.registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def profiles(request):
+    """Самые медленные из сохранённых профилей запросов."""
+    captured = sorted(profiling.captures(),
+                      key=lambda meta: meta['duration'], reverse=True)
+    slowest = captured[:settings.PROFILE_LIST_SIZE]
+    for meta in slowest:
+        meta['functions'] = profiling.top_functions(meta['name'])
+    return render(request, 'core/profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'captures': slowest,
+        'total': len(captured),
+    })
+
+
+@staff_member_required
+def profile_download(request, name):
+    filename = profiling.path(name)
+    if filename is None:
+        raise Http404('Профиль не найден')
+    return FileResponse(open(filename, 'rb'), as_attachment=True,
+                        filename=f'{name}.prof')
@@ -1,10 +1,77 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.utils.functional import cached_property
 
-from .models import Group, Post
+from . import search
+from .models import AuthorStats, Group, Post
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
+    # Нужны для подсказок автодополнения в форме поста.
+    search_fields = ('title', 'slug')
+    ordering = ('title',)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списка постов без COUNT(*) по всей таблице.
+
+    Без фильтров число постов складывается из счётчиков авторов.
+    С фильтром или поиском строки считаются не дальше count_limit:
+    если совпадений больше, capped истинно, список показывает
+    «count_limit+» и первые count_limit / per_page страниц, а выборку
+    стоит сузить.
+    """
+    count_limit = 10_000
+    capped = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            total = AuthorStats.objects.aggregate(total=Sum('post_count'))
+            return total['total'] or 0
+        count = queryset.order_by()[:self.count_limit + 1].count()
+        self.capped = count > self.count_limit
+        return min(count, self.count_limit)
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которому выбранный объект можно передать заранее.
+
+    Обычный виджет запрашивает выбранный объект из базы, то есть в списке
+    постов по запросу на строку; здесь он берётся из строки списка,
+    уже выбранной с JOIN.
+    """
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = {str(pk) for pk in value
+                    if str(pk) not in self.choices.field.empty_values}
+        known = {str(obj.pk): obj for obj in self.preloaded or ()}
+        if self.preloaded is None or not selected <= known.keys():
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for pk in selected:
+            label = self.choices.field.label_from_instance(known[pk])
+            options.append(self.create_option(
+                name, known[pk].pk, label, True, len(options)))
+        return [(None, options, 0)]
+
+
+class PostChangeListForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.fields['group'].widget
+        # Админка оборачивает виджет в RelatedFieldWidgetWrapper.
+        widget = getattr(widget, 'widget', widget)
+        group = self.instance.group if self.instance.group_id else None
+        widget.preloaded = [group] if group else []
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -13,14 +80,47 @@ class PostAdmin(admin.ModelAdmin):
         'text',
         'pub_date',
         'author',
-        'group'
+        'group',
+        'views'
     )
+    readonly_fields = ('views',)
 
     list_editable = ('group',)
+    # Автор и группа выбираются одним JOIN, а не запросом на строку.
+    list_select_related = ('author', 'group')
+    # Поля со списком на сотни тысяч вариантов не отрисовываются целиком:
+    # варианты подгружаются поиском по мере ввода.
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    # Переходы по датам — диапазоны по индексу post_pub_date_id_idx.
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        return super().get_changelist_form(
+            request, form=PostChangeListForm, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # LIKE '%слово%' по всей таблице заменяется индексом FTS5.
+        if not search_term or not search.is_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        return search.search_posts(queryset, search_term), False
+
+    def get_ordering(self, request):
+        if request.GET.get('q') and search.is_available():
+            return ('rank',)
+        return super().get_ordering(request)
+
 
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,55 @@
+"""Массовая вставка постов для команд загрузки данных."""
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from core.middleware.page_cache import purge_surrogate_keys
+
+from .cache import bump_feeds
+from .models import Post
+from .search import lock_for_write
+
+
+def insert_posts(posts, checkpoint=None):
+    """Вставляет пачку постов одной транзакцией, сохраняя их pub_date.
+
+    bulk_create проставил бы всем постам текущее время (auto_now_add),
+    поэтому вставка идёт в «сыром» режиме, как при загрузке фикстур:
+    значения полей пишутся как есть, а updated без значения получает
+    текущее время. Размер одного INSERT ограничен лимитом SQLite
+    на число параметров (bulk_batch_size).
+    Сигналы post_save при этом не отправляются: после загрузки нужно
+    пересчитать счётчики (posts.counters.rebuild) и вызвать
+    invalidate_posts. Позиция загрузки checkpoint (ImportCheckpoint)
+    сохраняется в той же транзакции, что и пачка.
+    """
+    now = timezone.now()
+    for post in posts:
+        if post.pub_date is None:
+            post.pub_date = now
+        if post.updated is None:
+            post.updated = now
+    fields = [field for field in Post._meta.concrete_fields
+              if not field.primary_key]
+    using = router.db_for_write(Post)
+    size = connections[using].ops.bulk_batch_size(fields, posts) or 1
+    with transaction.atomic(using=using):
+        lock_for_write(using)
+        for start in range(0, len(posts), size):
+            Post.objects.using(using)._insert(
+                posts[start:start + size], fields=fields, raw=True)
+        if checkpoint is not None:
+            checkpoint.save(using=using)
+
+
+def invalidate_posts(author_ids, groups):
+    """Сбрасывает кеши лент и страниц после вставки мимо сигналов.
+
+    author_ids — авторы вставленных постов, groups — пары (pk, slug)
+    их групп: затрагиваются только главная лента, эти профили и группы.
+    """
+    purge_surrogate_keys('index',
+                         *(f'author:{pk}' for pk in author_ids),
+                         *(f'group:{pk}' for pk, _ in groups))
+    bump_feeds('global',
+               *(f'author:{pk}' for pk in author_ids),
+               *(f'group:{slug}' for _, slug in groups))
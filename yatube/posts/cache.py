@@ -0,0 +1,53 @@
+"""Кеширование лент и страниц постов.
+
+Фрагменты лент хранятся с версиями по областям. Области: 'global' —
+главная лента, 'group:<slug>' — лента группы, 'author:<id>' — профиль
+автора. Изменение поста поднимает версии затронутых областей, и старые
+фрагменты перестают находиться.
+"""
+from django.conf import settings
+
+from core.cache import bump_versions, get_versions
+
+VERSION_KEY = 'posts:feed-version:{}'
+
+
+def post_scopes(author_id, group_slug):
+    scopes = ['global', f'author:{author_id}']
+    if group_slug:
+        scopes.append(f'group:{group_slug}')
+    return scopes
+
+
+def bump_feeds(*scopes):
+    bump_versions([VERSION_KEY.format(scope) for scope in set(scopes)])
+
+
+def feed_cache(request, scope):
+    """Параметры тега {% cache %} для ленты области scope."""
+    key = VERSION_KEY.format(scope)
+    version = get_versions([key])[key]
+    return {
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+        'key': f'{scope}:{version}:{request.GET.urlencode()}',
+    }
+
+
+def feed_surrogate_keys(group_id=None, author_id=None):
+    """Суррогатный ключ ленты: группы, автора или главной.
+
+    Общий для страниц лент, их RSS/Atom и валидаторов условных запросов.
+    """
+    if group_id is not None:
+        return [f'group:{group_id}']
+    if author_id is not None:
+        return [f'author:{author_id}']
+    return ['index']
+
+
+def post_surrogate_keys(post_id, author_id, group_id):
+    """Суррогатные ключи страницы поста: сам пост, автор и группа."""
+    keys = [f'post:{post_id}', f'author:{author_id}']
+    if group_id is not None:
+        keys.append(f'group:{group_id}')
+    return keys
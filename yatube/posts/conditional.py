@@ -0,0 +1,97 @@
+"""Валидаторы условных запросов для страниц постов и лент.
+
+ETag и Last-Modified вычисляются из лёгких метаданных: времени изменения
+поста или последнего изменения в ленте (один запрос по индексу) и версий
+суррогатных ключей страницы, которые поднимаются при удалении постов
+и переименовании авторов и групп; Last-Modified учитывает и время
+последнего такого сброса. Совпавший условный запрос получает 304
+до выборки постов и отрисовки шаблона.
+"""
+import hashlib
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from core.middleware.page_cache import last_purged, surrogate_versions
+
+from .cache import feed_surrogate_keys, post_surrogate_keys
+from .models import Group, Post, User
+
+
+def _memoized(state):
+    # etag_func и last_modified_func вызываются по очереди для одного
+    # запроса, а метаданные нужны обеим.
+    def wrapper(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state(request, *args, **kwargs)
+        return request._conditional_state
+    return wrapper
+
+
+@_memoized
+def feed_state(request, slug=None, username=None):
+    """Суррогатный ключ ленты и время последнего изменения в ней."""
+    if slug is not None:
+        row = Group.objects.filter(slug=slug).values_list(
+            'pk').annotate(modified=Max('post__updated')).first()
+        return row and (feed_surrogate_keys(group_id=row[0]), row[1])
+    if username is not None:
+        row = User.objects.filter(username=username).values_list(
+            'pk').annotate(modified=Max('posts__updated')).first()
+        return row and (feed_surrogate_keys(author_id=row[0]), row[1])
+    return feed_surrogate_keys(), Post.objects.aggregate(
+        modified=Max('updated'))['modified']
+
+
+@_memoized
+def post_state(request, post_id):
+    """Суррогатные ключи страницы поста и время его изменения."""
+    row = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author_id', 'group_id').first()
+    if row is None:
+        return None
+    updated, author_id, group_id = row
+    return post_surrogate_keys(post_id, author_id, group_id), updated
+
+
+def user_state(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return f'{user.pk}:{user.get_username()}'
+
+
+def conditional_page(state, per_user=True):
+    """Условная обработка GET для представления с метаданными state.
+
+    state(request, *args, **kwargs) возвращает (ключи, время изменения)
+    или None, если объекта нет, — тогда представление само ответит 404.
+    Страницы, зависящие от пользователя (per_user), учитывают его
+    в ETag, а Last-Modified отдают только анонимам: время изменения
+    не отражает вход и выход пользователя.
+    """
+    def etag(request, *args, **kwargs):
+        current = state(request, *args, **kwargs)
+        if current is None:
+            return None
+        keys, modified = current
+        parts = [modified.isoformat() if modified else '']
+        parts += surrogate_versions(*keys)
+        if per_user:
+            parts.append(user_state(request))
+        return hashlib.md5(
+            ':'.join(map(str, parts)).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if per_user and request.user.is_authenticated:
+            return None
+        current = state(request, *args, **kwargs)
+        if current is None:
+            return None
+        keys, modified = current
+        # Удаление поста и переименования не двигают MAX(updated),
+        # но сбрасывают суррогатные ключи страницы.
+        purged = last_purged(*keys)
+        return max(filter(None, (modified, purged)), default=None)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
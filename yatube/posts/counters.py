@@ -0,0 +1,65 @@
+"""Денормализованные счётчики постов у авторов и групп."""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Group, Post
+
+
+def shift_author(author_id, delta):
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        post_count=F('post_count') + delta
+    )
+    if not updated and delta > 0:
+        # Первый пост автора: строка счётчика создаётся по факту.
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={
+                'post_count': Post.objects.filter(
+                    author_id=author_id).count()
+            }
+        )
+
+
+def shift_group(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            post_count=F('post_count') + delta
+        )
+
+
+def _actual_count(field, outer):
+    return Coalesce(Subquery(
+        Post.objects.order_by().filter(**{field: OuterRef(outer)})
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def rebuild():
+    """Пересчитывает все счётчики несколькими UPDATE на уровне SQL."""
+    authors = Post.objects.order_by().values_list(
+        'author_id', flat=True).distinct()
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(author_id=pk) for pk in authors.iterator()),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    AuthorStats.objects.update(
+        post_count=_actual_count('author', 'author_id'))
+    Group.objects.update(post_count=_actual_count('group', 'pk'))
+
+
+def mismatches():
+    """Возвращает счётчики, расходящиеся с реальным числом постов.
+
+    Третий элемент — id авторов с постами, у которых нет строки счётчика.
+    """
+    authors = AuthorStats.objects.annotate(
+        actual=Count('author__posts')
+    ).filter(~Q(post_count=F('actual')))
+    groups = Group.objects.annotate(
+        actual=Count('post')
+    ).filter(~Q(post_count=F('actual')))
+    missing = Post.objects.order_by().filter(
+        author__stats__isnull=True
+    ).values_list('author_id', flat=True).distinct()
+    return list(authors), list(groups), list(missing)
@@ -0,0 +1,54 @@
+"""Потоковая выгрузка постов в JSONL и CSV.
+
+Поля совпадают с входным форматом команды import_posts, так что выгрузку
+можно загрузить обратно.
+"""
+import csv
+import json
+
+FIELDS = ('id', 'author', 'group', 'text', 'pub_date')
+COLUMNS = ('id', 'author__username', 'group__slug', 'text', 'pub_date')
+CHUNK_SIZE = 2_000
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Построчно читает посты, держа в памяти не больше chunk_size строк.
+
+    Порядок совпадает с индексами ленты, поэтому выборка по автору или
+    группе не сортируется во временном B-дереве.
+    """
+    rows = queryset.order_by('-pub_date', '-id').values_list(*COLUMNS)
+    for row in rows.iterator(chunk_size=chunk_size):
+        record = dict(zip(FIELDS, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        yield record
+
+
+def as_jsonl(rows):
+    for record in rows:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def as_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for record in rows:
+        yield writer.writerow(record.values())
+
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson; charset=utf-8', as_jsonl),
+    'csv': ('text/csv; charset=utf-8', as_csv),
+}
+
+
+def render(queryset, file_format, chunk_size=CHUNK_SIZE):
+    """Возвращает генератор строк выгрузки в формате file_format."""
+    return FORMATS[file_format][1](iter_rows(queryset, chunk_size))
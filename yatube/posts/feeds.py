@@ -0,0 +1,131 @@
+"""RSS и Atom ленты главной страницы, групп и авторов.
+
+Ленты опрашиваются постоянно, поэтому подключаются в urls через
+conditional_page: неизменившаяся лента отдаёт 304, не читая строк постов
+и ничего не отрисовывая.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.middleware.page_cache import add_surrogate_keys
+
+from .cache import feed_surrogate_keys
+from .conditional import conditional_page, feed_state
+from .models import Group, Post, User
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние обновления'
+    description = 'Новые посты на сайте'
+
+    def __call__(self, request, *args, **kwargs):
+        response = super().__call__(request, *args, **kwargs)
+        return add_surrogate_keys(response, *request.feed_surrogate_keys)
+
+    def get_feed(self, obj, request):
+        # Объект ленты доступен только здесь, а экземпляр ленты общий
+        # для всех потоков, поэтому ключи запоминаются в запросе.
+        request.feed_surrogate_keys = self.surrogate_keys(obj)
+        return super().get_feed(obj, request)
+
+    def surrogate_keys(self, obj):
+        return feed_surrogate_keys()
+
+    def link(self):
+        return reverse('posts:post_list')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related(
+            'author', 'group')[:settings.POSTS_PAGE]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def posts(self, obj):
+        return Post.objects.filter(group=obj)
+
+    def surrogate_keys(self, obj):
+        return feed_surrogate_keys(group_id=obj.pk)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: посты {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Новые посты пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+    def surrogate_keys(self, obj):
+        return feed_surrogate_keys(author_id=obj.pk)
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+def conditional(feed):
+    """Подключает ленту с условной обработкой GET.
+
+    Лента одинакова для всех посетителей, поэтому пользователь
+    в валидаторы не входит.
+    """
+    return conditional_page(feed_state, per_user=False)(feed)
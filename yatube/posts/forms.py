@@ -6,8 +6,9 @@ from .models import Post
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
         label = {
             'text': 'текст',
             'group': 'группа',
+            'image': 'картинка',
         }
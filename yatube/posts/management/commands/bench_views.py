@@ -0,0 +1,163 @@
+import json
+import platform
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.queries import QueryRecorder
+from posts.models import AuthorStats, Group, Post
+from posts.utils import encode_cursor
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет представления posts на первой и глубокой странице: '
+        'число запросов, p50/p95 времени ответа и пик памяти. '
+        'Результат сохраняется в JSON для сравнения прогонов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--depth', type=float, default=0.9,
+            help='Глубина «глубокой» страницы как доля длины ленты, '
+                 'от 0 до 1 (не включая 1).',
+        )
+        parser.add_argument(
+            '--mode', choices=('page', 'countless', 'cursor'),
+            default=settings.POSTS_PAGINATION,
+            help='Режим пагинации лент.',
+        )
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help='Не отключать кеш фрагментов и страниц.',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON.')
+        parser.add_argument('--compare',
+                            help='JSON прошлого прогона для сравнения.')
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError('Нет постов: сначала запустите seed_posts.')
+        if not 0 <= options['depth'] < 1:
+            raise CommandError('--depth должна быть в диапазоне [0, 1).')
+        overrides = {'POSTS_PAGINATION': options['mode']}
+        if not options['with_cache']:
+            overrides.update(FEED_CACHE_TIMEOUT=0, PAGE_CACHE_TIMEOUT=0)
+        client = Client()
+        results = []
+        with override_settings(**overrides):
+            for name, url in self.endpoints(options):
+                result = self.measure(client, url, options)
+                result['name'] = name
+                results.append(result)
+                self.stdout.write(
+                    f'{name:<24} {result["status"]} '
+                    f'p50 {result["p50_ms"]:8.2f} мс  '
+                    f'p95 {result["p95_ms"]:8.2f} мс  '
+                    f'запросов {result["queries"]:3}  '
+                    f'пик {result["peak_kib"]:8.1f} КиБ'
+                )
+        report = {
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'mode': options['mode'],
+            'cache': options['with_cache'],
+            'posts': Post.objects.count(),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def endpoints(self, options):
+        depth = options['depth']
+        cursor_mode = options['mode'] == 'cursor'
+        group = Group.objects.order_by('-post_count').first()
+        stats = AuthorStats.objects.select_related('author').order_by(
+            '-post_count').first()
+        feeds = [('index', reverse('posts:post_list'), Post.objects.all())]
+        if group is not None:
+            feeds.append((
+                'group',
+                reverse('posts:group_list', kwargs={'slug': group.slug}),
+                Post.objects.filter(group=group),
+            ))
+        if stats is not None:
+            feeds.append((
+                'profile',
+                reverse('posts:profile',
+                        kwargs={'username': stats.author.username}),
+                Post.objects.filter(author_id=stats.author_id),
+            ))
+        for name, url, posts in feeds:
+            yield f'{name}:first', url
+            offset = int(posts.count() * depth)
+            if cursor_mode:
+                post = posts.order_by('-pub_date', '-id')[offset]
+                yield f'{name}:deep', f'{url}?after={encode_cursor(post)}'
+            else:
+                page = offset // settings.POSTS_PAGE + 1
+                yield f'{name}:deep', f'{url}?page={page}'
+        post = Post.objects.first()
+        yield 'post_detail', reverse('posts:post_detail',
+                                     kwargs={'post_id': post.pk})
+        word = post.text.split()[0]
+        yield 'search', f'{reverse("posts:search")}?q={word}'
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        with QueryRecorder() as queries:
+            client.get(url)
+        tracemalloc.start()
+        try:
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(timings, 0.5),
+            'p95_ms': percentile(timings, 0.95),
+            'mean_ms': sum(timings) / len(timings),
+            'queries': len(queries),
+            'peak_kib': peak / 1024,
+            'bytes': len(response.content),
+        }
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as file:
+            previous = {row['name']: row for row in json.load(file)['results']}
+        self.stdout.write(f'\nСравнение с {path}:')
+        for row in results:
+            old = previous.get(row['name'])
+            if old is None:
+                continue
+            change = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+            self.stdout.write(
+                f'{row["name"]:<24} p50 {old["p50_ms"]:8.2f} → '
+                f'{row["p50_ms"]:8.2f} мс ({change:+.1f}%)  '
+                f'запросов {old["queries"]} → {row["queries"]}'
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты автора, группы или все посты в JSONL '
+        'или CSV (формат команды import_posts).'
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--author', help='username автора.')
+        target.add_argument('--group', help='slug группы.')
+        parser.add_argument('--format', choices=tuple(export.FORMATS),
+                            default='jsonl')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=export.CHUNK_SIZE,
+                            help='Строк в одной выборке из базы.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['author']:
+            if not User.objects.filter(username=options['author']).exists():
+                raise CommandError(f'Нет автора {options["author"]}.')
+            posts = posts.filter(author__username=options['author'])
+        elif options['group']:
+            if not Group.objects.filter(slug=options['group']).exists():
+                raise CommandError(f'Нет группы {options["group"]}.')
+            posts = posts.filter(group__slug=options['group'])
+
+        lines = export.render(posts, options['format'],
+                              options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as file:
+            file.writelines(lines)
@@ -0,0 +1,186 @@
+import csv
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import counters
+from posts.bulk import insert_posts, invalidate_posts
+from posts.models import Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты из JSONL или CSV. Поля записи: author '
+        '(username), text, необязательные group (slug), group_title '
+        'и pub_date (ISO 8601). Недостающие авторы и группы создаются. '
+        'После прерывания загрузка продолжается с последней '
+        'сохранённой пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='По умолчанию определяется по расширению файла.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Постов в одной транзакции.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя сохранённой позиции загрузки; по умолчанию '
+                 'абсолютный путь к файлу.',
+        )
+        parser.add_argument('--restart', action='store_true',
+                            help='Игнорировать сохранённую позицию.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl')
+        source = options['checkpoint'] or os.path.abspath(path)
+        if options['restart']:
+            ImportCheckpoint.objects.filter(source=source).delete()
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(
+            source=source)
+        if not created:
+            self.stdout.write(
+                f'Продолжение со строки {checkpoint.line + 1}, '
+                f'загружено ранее: {checkpoint.imported}.'
+            )
+        state = {'offset': checkpoint.offset, 'line': checkpoint.line}
+
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.touched_authors = set()
+        self.touched_groups = set()
+        batch = []
+        with open(path, 'rb') as file:
+            for record, position in self.read(file, file_format, state):
+                batch.append((self.clean(record, position), position))
+                if len(batch) >= options['batch_size']:
+                    self.flush(batch, checkpoint)
+                    batch = []
+            self.flush(batch, checkpoint)
+        self.stdout.write('')
+
+        counters.rebuild()
+        # Пересчитанные счётчики показываются на страницах авторов и групп.
+        invalidate_posts(self.touched_authors, self.touched_groups)
+        checkpoint.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {checkpoint.imported}.'))
+
+    def read(self, file, file_format, state):
+        """Читает записи по одной вместе с позицией конца каждой из них.
+
+        Позиция — смещение в байтах, поэтому продолжение не требует
+        перечитывать уже загруженную часть файла.
+        """
+        position = {'offset': state['offset'], 'line': state['line']}
+
+        def lines():
+            for line in file:
+                position['offset'] += len(line)
+                position['line'] += 1
+                yield line.decode('utf-8')
+
+        if file_format == 'csv':
+            header = next(csv.reader([file.readline().decode('utf-8-sig')]))
+            if state['offset']:
+                file.seek(state['offset'])
+            else:
+                position['offset'] = file.tell()
+            records = (dict(zip(header, row))
+                       for row in csv.reader(lines()) if row)
+        else:
+            file.seek(state['offset'])
+            records = (json.loads(line) for line in lines() if line.strip())
+        try:
+            for record in records:
+                yield record, dict(position)
+        except (ValueError, csv.Error) as error:
+            raise CommandError(
+                f'Строка {position["line"]}: {error}') from error
+
+    def flush(self, batch, checkpoint):
+        if not batch:
+            return
+        self.resolve_authors({record['author'] for record, _ in batch})
+        self.resolve_groups({
+            record['group']: record['group_title']
+            for record, _ in batch if record['group']
+        })
+        posts = [
+            Post(
+                text=record['text'],
+                author_id=self.authors[record['author']],
+                group_id=self.groups.get(record['group']),
+                pub_date=record['pub_date'],
+            )
+            for record, _ in batch
+        ]
+        # Позиция пишется в транзакции пачки: при сбое откатываются обе,
+        # и повторный запуск не загрузит пачку дважды.
+        position = batch[-1][1]
+        checkpoint.offset = position['offset']
+        checkpoint.line = position['line']
+        checkpoint.imported += len(posts)
+        insert_posts(posts, checkpoint)
+        # Пачка уже видна в лентах, даже если загрузка дальше прервётся.
+        authors = {post.author_id for post in posts}
+        groups = {(self.groups[record['group']], record['group'])
+                  for record, _ in batch if record['group']}
+        invalidate_posts(authors, groups)
+        self.touched_authors |= authors
+        self.touched_groups |= groups
+        self.stdout.write(f'Постов: {checkpoint.imported}', ending='\r')
+
+    @staticmethod
+    def clean(record, position):
+        try:
+            if not record['author'] or not record['text']:
+                raise ValueError('пустые author или text')
+            pub_date = timezone.now()
+            if record.get('pub_date'):
+                pub_date = parse_datetime(record['pub_date'])
+                if pub_date is None:
+                    raise ValueError('неверный формат pub_date')
+                if timezone.is_naive(pub_date):
+                    pub_date = timezone.make_aware(pub_date)
+        except (KeyError, TypeError, ValueError) as error:
+            raise CommandError(
+                f'Строка {position["line"]}: {error!r}') from error
+        return {
+            'author': record['author'],
+            'text': record['text'],
+            'group': record.get('group') or None,
+            'group_title': record.get('group_title'),
+            'pub_date': pub_date,
+        }
+
+    def resolve_authors(self, usernames):
+        missing = usernames - self.authors.keys()
+        if missing:
+            User.objects.bulk_create(
+                (User(username=name, password='!') for name in missing),
+                ignore_conflicts=True,
+            )
+            self.authors.update(User.objects.filter(
+                username__in=missing).values_list('username', 'pk'))
+
+    def resolve_groups(self, titles):
+        missing = titles.keys() - self.groups.keys()
+        if missing:
+            Group.objects.bulk_create(
+                (Group(slug=slug, title=titles[slug] or slug, description='')
+                 for slug in missing),
+                ignore_conflicts=True,
+            )
+            self.groups.update(Group.objects.filter(
+                slug__in=missing).values_list('slug', 'pk'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает или проверяет счётчики постов авторов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            counters.rebuild()
+            self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
+            return
+        authors, groups, missing = counters.mismatches()
+        for stats in authors:
+            self.stdout.write(
+                f'Автор {stats.author_id}: {stats.post_count} '
+                f'вместо {stats.actual}'
+            )
+        for group in groups:
+            self.stdout.write(
+                f'Группа {group.slug}: {group.post_count} '
+                f'вместо {group.actual}'
+            )
+        for author_id in missing:
+            self.stdout.write(f'Автор {author_id}: нет счётчика')
+        if authors or groups or missing:
+            raise CommandError('Счётчики расходятся с числом постов.')
+        self.stdout.write(self.style.SUCCESS('Счётчики в порядке.'))
@@ -0,0 +1,117 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import counters
+from posts.bulk import insert_posts
+from posts.models import Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    'лето осень зима весна город море река лес поле дом улица друг '
+    'книга кино музыка работа отпуск дорога поезд самолёт кофе чай '
+    'утро вечер ночь день солнце дождь снег ветер небо звезда'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для замеров: авторы '
+        'с перекошенным (по закону Ципфа) числом постов, группы и посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--groups', type=int, default=1_000)
+        parser.add_argument('--authors', type=int, default=10_000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для распределения постов по авторам '
+                 'и группам; 0 — равномерно.',
+        )
+        parser.add_argument(
+            '--no-group', type=float, default=0.2,
+            help='Доля постов без группы.',
+        )
+        parser.add_argument('--days', type=int, default=3 * 365,
+                            help='За сколько дней разбросаны даты постов.')
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Постов в одной транзакции.')
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        prefix = options['prefix']
+        authors = self.create_authors(prefix, options['authors'])
+        groups = self.create_groups(prefix, options['groups'])
+        author_weights = self.zipf_weights(len(authors), options['skew'])
+        group_weights = self.zipf_weights(len(groups), options['skew'])
+        rnd.shuffle(authors)
+
+        now = timezone.now()
+        step = timedelta(days=options['days']) / max(options['posts'], 1)
+        batch_size = options['batch_size']
+        created = 0
+        while created < options['posts']:
+            size = min(batch_size, options['posts'] - created)
+            batch_authors = rnd.choices(
+                authors, cum_weights=author_weights, k=size)
+            batch_groups = rnd.choices(
+                groups, cum_weights=group_weights, k=size) \
+                if groups else [None] * size
+            posts = []
+            for i, (author_id, group_id) in enumerate(
+                    zip(batch_authors, batch_groups)):
+                if rnd.random() < options['no_group']:
+                    group_id = None
+                posts.append(Post(
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=' '.join(rnd.choices(
+                        WORDS, k=rnd.randint(5, 60))).capitalize(),
+                    pub_date=now - step * (options['posts'] - created - i),
+                ))
+            insert_posts(posts)
+            created += size
+            self.stdout.write(f'Постов: {created}', ending='\r')
+        self.stdout.write('')
+
+        counters.rebuild()
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: авторов {len(authors)}, групп {len(groups)}, '
+            f'постов {created}.'
+        ))
+
+    @staticmethod
+    def zipf_weights(size, skew):
+        weights = (1 / (rank ** skew) for rank in range(1, size + 1))
+        return list(itertools.accumulate(weights))
+
+    def create_authors(self, prefix, count):
+        User.objects.bulk_create(
+            (User(username=f'{prefix}_author_{i}', password='!')
+             for i in range(count)),
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_author_'
+        ).values_list('pk', flat=True))
+
+    def create_groups(self, prefix, count):
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {i}', slug=f'{prefix}-group-{i}',
+                   description='Синтетическая группа')
+             for i in range(count)),
+            ignore_conflicts=True,
+        )
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-group-'
+        ).values_list('pk', flat=True))
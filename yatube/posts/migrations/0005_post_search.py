@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from posts import search
+
+
+def install_search(apps, schema_editor):
+    search.install(schema_editor.connection, rebuild=True)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
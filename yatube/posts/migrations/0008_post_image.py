@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Картинка к посту', upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Источник')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Смещение')),
+                ('line', models.PositiveIntegerField(default=0, verbose_name='Строка')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='Загружено постов')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Изменена')),
+            ],
+            options={
+                'verbose_name': 'Позиция загрузки',
+                'verbose_name_plural': 'Позиции загрузки',
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from .search import lock_for_write
 
 User = get_user_model()
 
@@ -9,11 +11,63 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    post_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
 
 
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    post_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.author}: {self.post_count}'
+
+
+class ImportCheckpoint(models.Model):
+    """Позиция загрузки файла командой import_posts.
+
+    Хранится в базе и сохраняется в одной транзакции с пачкой постов:
+    пачка и позиция после неё фиксируются или откатываются вместе.
+    """
+    source = models.CharField(
+        verbose_name='Источник',
+        max_length=255,
+        unique=True
+    )
+    offset = models.BigIntegerField(verbose_name='Смещение', default=0)
+    line = models.PositiveIntegerField(verbose_name='Строка', default=0)
+    imported = models.PositiveIntegerField(
+        verbose_name='Загружено постов',
+        default=0
+    )
+    updated = models.DateTimeField(verbose_name='Изменена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Позиция загрузки'
+        verbose_name_plural = 'Позиции загрузки'
+
+    def __str__(self):
+        return f'{self.source}: {self.line}'
+
+
 class Post(models.Model):
     objects = None
     text = models.TextField(
@@ -24,6 +78,10 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -38,9 +96,46 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост'
     )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        blank=True,
+        help_text='Картинка к посту'
+    )
+    # Копится в памяти процесса и сбрасывается пачками (posts.view_counts).
+    views = models.PositiveIntegerField(
+        verbose_name='Просмотры',
+        default=0,
+        editable=False
+    )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_id_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            # Время последнего изменения ленты для условных запросов.
+            models.Index(fields=['updated'], name='post_updated_idx'),
+            models.Index(fields=['group', 'updated'],
+                         name='post_group_updated_idx'),
+            models.Index(fields=['author', 'updated'],
+                         name='post_author_updated_idx'),
+        ]
 
     def __str__(self):
         return self.text[0:15]
+
+    def save(self, *args, **kwargs):
+        # Счётчики постов обновляются в сигналах внутри той же транзакции.
+        with transaction.atomic():
+            lock_for_write()
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            lock_for_write()
+            return super().delete(*args, **kwargs)
@@ -0,0 +1,126 @@
+"""Полнотекстовый поиск по тексту постов через SQLite FTS5.
+
+Таблица posts_post_fts хранит только индекс (external content) и
+синхронизируется триггерами, поэтому её видят и bulk_create, и правки
+в обход ORM. SQLite удаляет триггеры, когда миграция пересоздаёт
+таблицу posts_post, так что они восстанавливаются после каждой миграции.
+"""
+import re
+
+from django.db import connections
+
+FTS_TABLE = 'posts_post_fts'
+MAX_TERMS = 10
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    text,
+    content='posts_post',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+CREATE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+
+REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def is_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def install(connection, rebuild=False):
+    """Создаёт индекс и триггеры; rebuild заново заполняет индекс."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(REBUILD)
+
+
+def restore_triggers(connection):
+    """Возвращает триггеры, если индекс уже создан миграцией."""
+    if connection.vendor != 'sqlite':
+        return
+    if FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def uninstall(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def lock_for_write(using='default'):
+    """Сразу делает текущую транзакцию SQLite пишущей.
+
+    Триггеры FTS5 читают индекс раньше, чем запрос получает блокировку
+    на запись. Если в этот момент пишет другое соединение, SQLite не ждёт
+    timeout, а сразу отвечает «database is locked». Пустой UPDATE в начале
+    транзакции берёт блокировку заранее, и конкурирующие писатели ждут.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE posts_post SET id = id WHERE id = -1')
+
+
+def build_match(query):
+    """Превращает пользовательский запрос в выражение MATCH.
+
+    Каждое слово берётся в кавычки (операторы FTS5 в запросе не работают)
+    и ищется по префиксу; слова объединяются через И.
+    """
+    terms = re.findall(r'\w+', query)[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_posts(queryset, query):
+    """Фильтрует посты по запросу и сортирует их по BM25.
+
+    Если запрос пуст после разбора, возвращается пустой набор.
+    """
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    return queryset.extra(
+        select={'rank': f'bm25({FTS_TABLE})'},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = posts_post.id',
+               f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+    ).order_by('rank', '-pub_date', '-id')
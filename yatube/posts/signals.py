@@ -0,0 +1,151 @@
+from django.db import connections
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from django.urls import Resolver404, resolve
+
+from core.middleware.page_cache import page_cache_hit, purge_surrogate_keys
+
+from . import counters, search, thumbnails, view_counts
+from .cache import bump_feeds, post_scopes, post_surrogate_keys
+from .models import Group, Post, User
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw, **kwargs):
+    """Запоминает автора и группу поста до сохранения."""
+    instance._previous = None
+    if instance.pk is not None and not raw:
+        instance._previous = Post.objects.filter(pk=instance.pk).values_list(
+            'author_id', 'group_id', 'group__slug'
+        ).first()
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None:
+        counters.shift_author(instance.author_id, 1)
+        counters.shift_group(instance.group_id, 1)
+        return
+    author_id, group_id, _ = previous
+    if author_id != instance.author_id:
+        counters.shift_author(author_id, -1)
+        counters.shift_author(instance.author_id, 1)
+    if group_id != instance.group_id:
+        counters.shift_group(group_id, -1)
+        counters.shift_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    counters.shift_author(instance.author_id, -1)
+    counters.shift_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_feeds_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    scopes = post_scopes(instance.author_id,
+                         instance.group.slug if instance.group else None)
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        author_id, _, group_slug = previous
+        scopes += post_scopes(author_id, group_slug)
+    bump_feeds(*scopes)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_feeds_on_delete(sender, instance, **kwargs):
+    group = instance.group if instance.group_id else None
+    bump_feeds(*post_scopes(instance.author_id, group and group.slug))
+
+
+@receiver(post_save, sender=Post)
+def purge_pages_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    keys = ['index'] + post_surrogate_keys(
+        instance.pk, instance.author_id, instance.group_id)
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        author_id, group_id, _ = previous
+        keys += post_surrogate_keys(instance.pk, author_id, group_id)
+    purge_surrogate_keys(*keys)
+
+
+@receiver(post_delete, sender=Post)
+def purge_pages_on_delete(sender, instance, **kwargs):
+    purge_surrogate_keys('index', *post_surrogate_keys(
+        instance.pk, instance.author_id, instance.group_id))
+
+
+@receiver(post_save, sender=Post)
+def prepare_thumbnails(sender, instance, raw, **kwargs):
+    if raw or not instance.image:
+        return
+    if not thumbnails.is_ready(instance.image.name):
+        thumbnails.schedule(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group_pages(sender, instance, **kwargs):
+    purge_surrogate_keys('index', f'group:{instance.pk}')
+
+
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def display_name(user):
+    # Отложенные поля (only/defer) не читаются: это был бы запрос.
+    return tuple(user.__dict__.get(field) for field in NAME_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_name(sender, instance, **kwargs):
+    """Запоминает имя, с которым пользователь загружен, без запроса."""
+    instance._loaded_name = display_name(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_author_pages(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login — страницы не меняются.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    purge_surrogate_keys(f'author:{instance.pk}')
+    loaded, instance._loaded_name = (
+        instance._loaded_name, display_name(instance))
+    if loaded == instance._loaded_name:
+        return
+    # Имя автора показывают и главная лента, и ленты групп с его постами.
+    # Сброс их ключей меняет и ETag, и Last-Modified (last_purged).
+    groups = list(Group.objects.filter(post__author_id=instance.pk)
+                  .distinct().values_list('pk', 'slug'))
+    if not groups and not instance.posts.exists():
+        return
+    purge_surrogate_keys('index', *(f'group:{pk}' for pk, _ in groups))
+    bump_feeds(*post_scopes(instance.pk, None),
+               *(f'group:{slug}' for _, slug in groups))
+
+
+@receiver(page_cache_hit)
+def count_cached_post_views(sender, request, response, **kwargs):
+    # Страница поста из кеша отдаётся без представления, и просмотр
+    # иначе не попал бы в счётчик.
+    if request.method != 'GET' or response.status_code not in (200, 304):
+        return
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return
+    if match.view_name == 'posts:post_detail':
+        view_counts.record(int(match.kwargs['post_id']))
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    search.restore_triggers(connections[using])
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from core.queries import QueryRecorder
+
+from .. import counters
+from ..admin import EstimatedCountPaginator
+from ..models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(title='Группа котов', slug='cats',
+                                         description='Описание')
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_posts(self, number):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}',
+                 group=self.group if i % 2 else None)
+            for i in range(number)
+        )
+        counters.rebuild()
+
+    def changelist(self, **params):
+        with QueryRecorder() as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Автор и группа строк списка не запрашиваются по одной."""
+        self.create_posts(2)
+        _, few = self.changelist()
+        self.create_posts(20)
+        response, many = self.changelist()
+        self.assertEqual(few, many)
+        self.assertContains(response, 'Группа котов', count=11)
+
+    def test_unfiltered_count_comes_from_counters(self):
+        """Без фильтров число постов берётся из счётчиков авторов."""
+        self.create_posts(3)
+        AuthorStats.objects.update(post_count=1_000_000)
+        response, _ = self.changelist()
+        self.assertEqual(response.context['cl'].result_count, 1_000_000)
+
+    def test_filtered_count_is_capped(self):
+        self.create_posts(6)
+        with mock.patch.object(EstimatedCountPaginator, 'count_limit', 4):
+            response, _ = self.changelist(group__id__exact=self.group.pk)
+            self.assertEqual(response.context['cl'].result_count, 3)
+            self.assertNotContains(response, '3+')
+            response, _ = self.changelist(pub_date__year=2000)
+            self.assertEqual(response.context['cl'].result_count, 0)
+            response, _ = self.changelist(author__id__exact=self.user.pk)
+            self.assertEqual(response.context['cl'].result_count, 4)
+            # Число совпадений не выдаётся за точное.
+            self.assertContains(response, '4+ posts')
+
+    def test_author_and_group_use_autocomplete(self):
+        self.create_posts(2)
+        post = Post.objects.filter(group=self.group).get()
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=[post.pk]))
+        for name in ('author', 'group'):
+            with self.subTest(field=name):
+                widget = response.context['adminform'].form[name].field.widget
+                self.assertEqual(widget.widget.__class__.__name__,
+                                 'PreloadedAutocompleteSelect')
+        self.assertContains(response, 'selected>Группа котов</option>')
+        autocomplete = self.client.get(
+            reverse('admin:posts_group_autocomplete'), {'term': 'кот'})
+        self.assertEqual(autocomplete.json()['results'],
+                         [{'id': str(self.group.pk), 'text': 'Группа котов'}])
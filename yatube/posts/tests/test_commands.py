@@ -0,0 +1,171 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import counters
+from ..models import Group, ImportCheckpoint, Post
+
+User = get_user_model()
+
+
+class SeedAndBenchCommandsTest(TestCase):
+    def test_seed_posts(self):
+        """seed_posts создаёт данные и согласованные счётчики."""
+        call_command('seed_posts', posts=500, authors=20, groups=5,
+                     batch_size=200, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 500)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(counters.mismatches(), ([], [], []))
+        top, *_, bottom = (
+            User.objects.order_by('-stats__post_count')
+            .values_list('stats__post_count', flat=True)
+        )
+        self.assertGreater(top, bottom)
+
+    def test_bench_views_writes_json(self):
+        """bench_views сохраняет результаты замеров в JSON."""
+        call_command('seed_posts', posts=100, authors=5, groups=2,
+                     stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench_views', repeat=2, warmup=0, output=path,
+                         stdout=StringIO())
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        names = {row['name'] for row in report['results']}
+        self.assertLessEqual({'index:first', 'index:deep', 'group:deep',
+                              'profile:deep', 'post_detail'}, names)
+        for row in report['results']:
+            with self.subTest(name=row['name']):
+                self.assertEqual(row['status'], 200)
+                self.assertGreater(row['queries'], 0)
+
+    def test_bench_views_rejects_full_depth(self):
+        call_command('seed_posts', posts=20, authors=2, groups=1,
+                     stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, '--depth'):
+            call_command('bench_views', depth=1.0, mode='cursor',
+                         stdout=StringIO())
+
+
+class ImportPostsCommandTest(TestCase):
+    RECORDS = [
+        {'author': 'writer', 'text': 'Первый', 'group': 'news',
+         'group_title': 'Новости', 'pub_date': '2020-01-01T10:00:00'},
+        {'author': 'writer', 'text': 'Второй\nв две строки'},
+        {'author': 'reader', 'text': 'Третий', 'group': 'news'},
+        {'author': 'reader', 'text': 'Четвёртый'},
+        {'author': 'writer', 'text': 'Пятый', 'group': 'talks'},
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_jsonl(self, records):
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def test_import_jsonl(self):
+        """Записи загружаются пачками, авторы и группы создаются."""
+        path = self.write_jsonl(self.RECORDS)
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            set(User.objects.values_list('username', flat=True)),
+            {'writer', 'reader'})
+        news = Group.objects.get(slug='news')
+        self.assertEqual(news.title, 'Новости')
+        self.assertEqual(news.post_count, 2)
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(
+            (first.pub_date.year, first.pub_date.month), (2020, 1))
+        self.assertEqual(counters.mismatches(), ([], [], []))
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_import_resumes_from_checkpoint(self):
+        """После сбоя загрузка продолжается с сохранённой позиции."""
+        broken = self.RECORDS[:2] + [{'text': 'без автора'}]
+        path = self.write_jsonl(broken)
+        with self.assertRaises(CommandError):
+            call_command('import_posts', path, batch_size=2,
+                         stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        checkpoint = ImportCheckpoint.objects.get(source=path)
+        self.assertEqual((checkpoint.line, checkpoint.imported), (2, 2))
+
+        self.write_jsonl(self.RECORDS)
+        call_command('import_posts', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Post.objects.filter(text='Первый').count(), 1)
+
+    def test_batch_and_checkpoint_commit_together(self):
+        """Если позиция не сохранилась, не сохраняется и пачка."""
+        path = self.write_jsonl(self.RECORDS)
+        ImportCheckpoint.objects.create(source=path)
+        with mock.patch.object(ImportCheckpoint, 'save',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                call_command('import_posts', path, batch_size=2,
+                             stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
+
+    def test_import_refreshes_cached_feeds(self):
+        """Загрузка сбрасывает только затронутые ленты, не весь кеш."""
+        self.client.get(reverse('posts:post_list'))
+        cache.set('unrelated', 1)
+        call_command('import_posts', self.write_jsonl(self.RECORDS),
+                     stdout=StringIO())
+        self.assertContains(self.client.get(reverse('posts:post_list')),
+                            'Пятый')
+        self.assertEqual(cache.get('unrelated'), 1)
+
+    def test_import_csv(self):
+        """CSV с переводами строк внутри поля читается целиком."""
+        path = os.path.join(self.directory, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=('author', 'text',
+                                                      'group'))
+            writer.writeheader()
+            for record in self.RECORDS:
+                writer.writerow({key: record.get(key, '')
+                                 for key in writer.fieldnames})
+        call_command('import_posts', path, batch_size=3, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertTrue(
+            Post.objects.filter(text='Второй\nв две строки').exists())
+        self.assertFalse(Post.objects.get(text='Четвёртый').group)
+
+    def test_export_round_trip(self):
+        """Выгрузка export_posts загружается обратно import_posts."""
+        call_command('import_posts', self.write_jsonl(self.RECORDS),
+                     stdout=StringIO())
+        path = os.path.join(self.directory, 'export.csv')
+        call_command('export_posts', author='writer', format='csv',
+                     output=path, chunk_size=2)
+        Post.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            set(Post.objects.values_list('text', 'author__username',
+                                         'group__slug')),
+            {('Первый', 'writer', 'news'),
+             ('Второй\nв две строки', 'writer', None),
+             ('Пятый', 'writer', 'talks')})
+        self.assertEqual(
+            Post.objects.get(text='Первый').pub_date.year, 2020)
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -78,6 +79,18 @@ class TaskURLTests(TestCase):
             ).exists()
         )
 
+    def test_edit_post_rejects_non_image(self):
+        """Не картинка в поле image — ошибка формы, а не 500."""
+        upload = SimpleUploadedFile('post.gif', b'not an image',
+                                    content_type='image/gif')
+        response = self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'text2', 'image': upload})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['form'].errors['image'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Тестовый пост')
+
     def test_create_post_guest(self):
         post_count = Post.objects.count()
         form_data = {
@@ -1,4 +1,8 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
 from ..models import Group, Post
@@ -25,3 +29,62 @@ class PostModelTest(TestCase):
         """Проверяем, что у моделей корректно работает __str__."""
         self.assertEqual(self.post.text, str(self.post.text))
         self.assertEqual(self.group.title, str(self.group))
+
+    def test_post_tracks_modification_time(self):
+        """Правка поста сдвигает updated, но не pub_date."""
+        post = Post.objects.get(pk=self.post.pk)
+        pub_date, updated = post.pub_date, post.updated
+        post.text = 'Исправленный пост'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertGreater(post.updated, updated)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='first',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='second',
+            description='Тестовое описание',
+        )
+
+    def assertCounts(self, author, group, other_group):
+        self.user.stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.user.stats.post_count, author)
+        self.assertEqual(self.group.post_count, group)
+        self.assertEqual(self.other_group.post_count, other_group)
+
+    def test_counters_follow_posts(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   group=self.group)
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertCounts(2, 1, 0)
+
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(2, 0, 1)
+
+        post.delete()
+        self.assertCounts(1, 0, 0)
+
+    def test_rebuild_command(self):
+        """Команда post_counters находит и исправляет расхождения."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        Group.objects.filter(pk=self.group.pk).update(post_count=5)
+        with self.assertRaises(CommandError):
+            call_command('post_counters', '--check', stdout=StringIO())
+        call_command('post_counters', stdout=StringIO())
+        call_command('post_counters', '--check', stdout=StringIO())
+        self.assertCounts(1, 1, 0)
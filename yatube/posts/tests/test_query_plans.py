@@ -0,0 +1,135 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import counters
+from ..models import Group, Post
+from ..utils import encode_cursor
+
+User = get_user_model()
+
+# Полный проход по таблице без индекса или сортировка во временном B-дереве.
+BAD_PLAN = re.compile(r'\bSCAN (?:TABLE )?\w+$|USE TEMP B-TREE')
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+
+@override_settings(FEED_CACHE_TIMEOUT=0, PAGE_CACHE_TIMEOUT=0)
+class QueryPlanTests(TestCase):
+    """Планы всех запросов представлений posts не должны деградировать.
+
+    Для каждого запроса, который выполняет представление, снимается
+    EXPLAIN QUERY PLAN; тест падает на полном сканировании таблицы и на
+    сортировке во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName',
+                                            is_staff=True)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост {i}',
+                 group=cls.group if i % 2 else None)
+            for i in range(settings.POSTS_PAGE * 3)
+        )
+        counters.rebuild()
+        cls.post = Post.objects.filter(group=cls.group).first()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertPlansUseIndexes(self, method, url, data=None, allowed=()):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.authorized_client, method)(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertTrue(queries.captured_queries)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith(EXPLAINED):
+                continue
+            for step in self.explain(sql):
+                if any(pattern in step for pattern in allowed):
+                    continue
+                self.assertIsNone(
+                    BAD_PLAN.search(step),
+                    f'{method.upper()} {url}: «{step}» в запросе\n{sql}'
+                )
+
+    def feed_urls(self):
+        cursor = encode_cursor(self.post)
+        for url in (
+            reverse('posts:post_list'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.user.username}),
+        ):
+            yield 'page', f'{url}?page=2'
+            yield 'countless', f'{url}?page=2'
+            yield 'cursor', f'{url}?after={cursor}'
+            yield 'cursor', f'{url}?before={cursor}'
+
+    def test_feed_plans(self):
+        for mode, url in self.feed_urls():
+            with self.subTest(mode=mode, url=url):
+                with self.settings(POSTS_PAGINATION=mode):
+                    self.assertPlansUseIndexes('get', url)
+
+    def test_post_plans(self):
+        detail = reverse('posts:post_detail',
+                         kwargs={'post_id': self.post.pk})
+        edit = reverse('posts:post_edit', kwargs={'post_id': self.post.pk})
+        data = {'text': 'Новый текст', 'group': ''}
+        for method, url, data in (
+            ('get', detail, None),
+            ('get', edit, None),
+            ('get', reverse('posts:post_create'), None),
+            ('post', reverse('posts:post_create'), data),
+            ('post', edit, data),
+        ):
+            with self.subTest(method=method, url=url):
+                # Выпадающий список формы по определению перечисляет
+                # все группы.
+                self.assertPlansUseIndexes(method, url, data,
+                                           allowed=('SCAN posts_group',))
+
+    def test_syndication_plans(self):
+        for url in (
+            reverse('posts:post_list_rss'),
+            reverse('posts:group_list_rss', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile_atom',
+                    kwargs={'username': self.user.username}),
+        ):
+            with self.subTest(url=url):
+                self.assertPlansUseIndexes('get', url)
+
+    def test_export_plans(self):
+        for url in (
+            reverse('posts:profile_export',
+                    kwargs={'username': self.user.username}),
+            reverse('posts:group_export', kwargs={'slug': self.group.slug}),
+        ):
+            with self.subTest(url=url):
+                self.assertPlansUseIndexes('get', url)
+
+    def test_search_plans(self):
+        # Сортировка по BM25 всегда идёт во временном B-дереве:
+        # ранг вычисляется при поиске и не может лежать в индексе.
+        self.assertPlansUseIndexes(
+            'get', reverse('posts:search'), {'q': 'пост', 'page': 2},
+            allowed=('USE TEMP B-TREE FOR ORDER BY',)
+        )
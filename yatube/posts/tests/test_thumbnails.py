@@ -0,0 +1,119 @@
+import io
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from core.queries import QueryRecorder
+
+from .. import thumbnails
+from ..models import Post, User
+
+
+def uploaded_image(name='small.png', size=(1200, 800)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'purple').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+def thumbnail_url(post, preset):
+    return thumbnails.thumbnail_file(post.image.name, preset)[2].url
+
+
+class MediaRootMixin:
+    """Свой MEDIA_ROOT на класс: превью одного класса не видны другому."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='yatube-thumbnails-')
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+@override_settings(THUMBNAIL_WORKERS=0, PAGE_CACHE_TIMEOUT=0,
+                   FEED_CACHE_TIMEOUT=0)
+class ThumbnailPipelineTests(MediaRootMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='author')
+        self.client.force_login(self.user)
+
+    def test_thumbnails_are_prepared_after_upload(self):
+        """Миниатюры готовятся после коммита и показываются в лентах."""
+        post = Post.objects.create(author=self.user, text='С картинкой',
+                                   image=uploaded_image())
+        self.assertTrue(thumbnails.is_ready(post.image.name))
+        feed = self.client.get(reverse('posts:post_list'))
+        self.assertContains(feed, thumbnail_url(post, 'feed'))
+        self.assertNotContains(feed, post.image.url)
+        detail = self.client.get(reverse('posts:post_detail',
+                                         args=[post.pk]))
+        self.assertContains(detail, thumbnail_url(post, 'detail'))
+        thumbnail = thumbnails.lookup([post.image.name], 'feed')
+        self.assertEqual(thumbnail[post.image.name].size, [960, 339])
+
+    def test_page_reads_thumbnails_in_one_batch(self):
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {number}',
+                                image=uploaded_image(f'{number}.png'))
+        cache.clear()
+        with QueryRecorder() as queries:
+            response = self.client.get(reverse('posts:post_list'))
+        kvstore_queries = [query for query in queries
+                           if 'thumbnail_kvstore' in query['sql']]
+        self.assertEqual(len(kvstore_queries), 1)
+        for post in Post.objects.all():
+            self.assertContains(response, thumbnail_url(post, 'feed'))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, FEED_CACHE_TIMEOUT=0)
+class ThumbnailPendingTests(MediaRootMixin, TestCase):
+    def test_image_is_uploaded_with_form(self):
+        user = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        self.client.post(reverse('posts:post_create'),
+                         {'text': 'С картинкой', 'image': uploaded_image()})
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.startswith('posts/'))
+
+    def test_feed_does_not_wait_for_thumbnails(self):
+        """Пока миниатюры нет, лента показывает исходную картинку."""
+        user = User.objects.create_user(username='author')
+        # Внутри транзакции теста подготовка миниатюр не запускается.
+        post = Post.objects.create(author=user, text='Пост',
+                                   image=uploaded_image())
+        response = self.client.get(reverse('posts:post_list'))
+        self.assertContains(response, post.image.url)
+        self.assertFalse(thumbnails.is_ready(post.image.name))
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_render_in_worker_process(self):
+        name = default.storage.save('posts/worker.png', uploaded_image())
+        executor = thumbnails.executor()
+        try:
+            source, rendered = executor.submit(
+                thumbnails.render, name).result(timeout=30)
+        finally:
+            executor.shutdown()
+            thumbnails._executor = None
+        self.assertEqual(len(rendered), len(thumbnails.PRESETS))
+        for preset in thumbnails.PRESETS:
+            thumbnail = thumbnails.thumbnail_file(name, preset)[2]
+            self.assertTrue(thumbnail.exists())
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import view_counts
+from ..models import Post
+
+User = get_user_model()
+
+
+class ViewCountsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.other = Post.objects.create(author=cls.user, text='Другой пост')
+        cls.url = reverse('posts:post_detail', args=(cls.post.pk,))
+
+    def setUp(self):
+        cache.clear()
+        # Буфер общий для процесса: просмотры из других тестов не нужны.
+        view_counts.counter.take()
+
+    def views(self, post):
+        return Post.objects.values_list('views', flat=True).get(pk=post.pk)
+
+    def test_flush_adds_deltas_in_one_update(self):
+        """Просмотры копятся в памяти и сбрасываются одним UPDATE."""
+        for post in (self.post, self.post, self.post, self.other):
+            view_counts.record(post.pk)
+        self.assertEqual(self.views(self.post), 0)
+        self.assertEqual(view_counts.pending(self.post.pk), 3)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(view_counts.flush(), 4)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.views(self.post), 3)
+        self.assertEqual(self.views(self.other), 1)
+        self.assertEqual(view_counts.pending(self.post.pk), 0)
+
+    def test_failed_flush_keeps_deltas(self):
+        view_counts.record(self.post.pk)
+        with mock.patch('django.db.models.query.QuerySet.update',
+                        side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                view_counts.flush()
+        self.assertEqual(view_counts.pending(self.post.pk), 1)
+
+    def test_cached_and_conditional_views_are_counted(self):
+        """Просмотр из кеша страниц и ответ 304 тоже считаются."""
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        with self.settings(PAGE_CACHE_TIMEOUT=0):
+            response = self.client.get(self.url,
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(view_counts.pending(self.post.pk), 3)
+
+    def test_missing_post_is_not_counted(self):
+        self.client.get(reverse('posts:post_detail', args=(999,)))
+        self.assertEqual(view_counts.pending(999), 0)
+
+    def test_count_is_loaded_outside_cached_page(self):
+        """Страница поста не содержит счётчик в ETag и кеше: он приходит
+        из API со сохранёнными и ещё не сброшенными просмотрами."""
+        Post.objects.filter(pk=self.post.pk).update(views=5)
+        view_counts.record(self.post.pk)
+        url = reverse('api:post_views', args=(self.post.pk,))
+        self.assertContains(self.client.get(self.url), url)
+        response = self.client.get(url)
+        self.assertEqual(response.json()['views'], 7)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertFalse(response.has_header('ETag'))
+        missing = reverse('api:post_views', args=(999,))
+        self.assertEqual(self.client.get(missing).status_code, 404)
@@ -1,10 +1,23 @@
+import csv
+import json
+from datetime import timedelta
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
 
+from core.queries import QueryRecorder
+
+from .. import counters
 from ..models import Group, Post
+from ..utils import CursorPaginator
 
 User = get_user_model()
 
@@ -125,3 +138,438 @@ class TaskURLTests(TestCase):
         self.assertEqual(text, 'Тестовый пост')
         self.assertEqual(group, self.group)
         self.assertEqual(author, self.user)
+
+
+@override_settings(POSTS_PAGINATION='cursor')
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(settings.POSTS_PAGE * 2 + 3)
+        )
+        cls.urls = (
+            reverse('posts:post_list'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.user.username}),
+        )
+
+    def test_cursor_pages_walk_forward_and_back(self):
+        """Курсоры ведут по ленте вперёд и назад без пропусков."""
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'pk', flat=True)
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                seen = []
+                pages = []
+                response = self.client.get(url)
+                while True:
+                    page_obj = response.context['page_obj']
+                    pages.append([post.pk for post in page_obj])
+                    seen.extend(pages[-1])
+                    if not page_obj.has_next():
+                        break
+                    response = self.client.get(
+                        f'{url}?after={page_obj.next_cursor}')
+                self.assertEqual(seen, expected)
+                self.assertEqual(len(pages[-1]), 3)
+
+                response = self.client.get(
+                    f'{url}?before={page_obj.previous_cursor}')
+                self.assertEqual(
+                    [post.pk for post in response.context['page_obj']],
+                    pages[-2]
+                )
+
+    def test_cursor_page_has_no_page_numbers(self):
+        """Шаблон, рассчитанный на номера страниц, не падает на курсорной."""
+        page_obj = CursorPaginator(Post.objects.all(),
+                                   settings.POSTS_PAGE).get_page()
+        self.assertTrue(page_obj.has_other_pages())
+        self.assertFalse(hasattr(page_obj, 'next_page_number'))
+        template = engines.all()[0].from_string(
+            '{{ page_obj.number }}|{{ page_obj.next_page_number }}')
+        self.assertEqual(template.render({'page_obj': page_obj}), '|')
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.client.get(
+            reverse('posts:post_list') + '?after=broken')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.POSTS_PAGE)
+        self.assertFalse(page_obj.has_previous())
+
+
+@override_settings(POSTS_PAGINATION='countless')
+class CountlessPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(settings.POSTS_PAGE * 2 + 3)
+        )
+        counters.rebuild()
+
+    def test_pages_without_count(self):
+        """Страницы выбираются без SELECT COUNT(*)."""
+        url = reverse('posts:post_list')
+        for page, size, has_next in ((1, settings.POSTS_PAGE, True),
+                                     (3, 3, False)):
+            with self.subTest(page=page):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(f'{url}?page={page}')
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), size)
+                self.assertEqual(page_obj.has_next(), has_next)
+                self.assertFalse(any(
+                    'COUNT(' in query['sql'] for query in queries
+                ))
+
+    def test_profile_shows_total(self):
+        """Профиль показывает общее число постов из счётчика автора."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertEqual(response.context['post_count'],
+                         settings.POSTS_PAGE * 2 + 3)
+
+    def test_page_window_is_elided(self):
+        """В навигации выводится окно страниц, а не все номера."""
+        response = self.client.get(reverse('posts:post_list') + '?page=2')
+        self.assertContains(response, '?page=3')
+        self.assertNotContains(response, 'Последняя')
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Первый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:post_list'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.user.username}),
+        )
+
+    def test_cached_feed_skips_post_rows(self):
+        """Повторный показ ленты не выбирает строки постов."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, 'Первый пост')
+                self.assertFalse(any(
+                    '"posts_post"."text"' in query['sql']
+                    for query in queries
+                ))
+
+    def test_writes_invalidate_feeds(self):
+        """Создание и правка поста сразу видны во всех лентах."""
+        for url in self.urls:
+            self.client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.pk}
+        )
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Исправленный пост', 'group': self.group.pk}
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Новый пост')
+                self.assertContains(response, 'Исправленный пост')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.posts = Post.objects.bulk_create([
+            Post(author=cls.user, text='Кошки любят молоко'),
+            Post(author=cls.user, text='Собаки любят кости, кости, кости'),
+            Post(author=cls.user, text='Про кости и кошек'),
+        ])
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return [post.text for post in response.context['page_obj']]
+
+    def test_prefix_search_is_ranked(self):
+        """Поиск находит слова по началу и ставит выше частые совпадения."""
+        self.assertCountEqual(self.search('кош'), ['Про кости и кошек',
+                                                   'Кошки любят молоко'])
+        self.assertEqual(self.search('кости')[0],
+                         'Собаки любят кости, кости, кости')
+        self.assertEqual(self.search('любят молоко'),
+                         ['Кошки любят молоко'])
+
+    def test_index_follows_edits(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(text='Кошки любят молоко')
+        post.text = 'Кошки любят сметану'
+        post.save()
+        self.assertEqual(self.search('молоко'), [])
+        self.assertEqual(self.search('сметан'), ['Кошки любят сметану'])
+        post.delete()
+        self.assertEqual(self.search('сметан'), [])
+
+    def test_operators_are_not_interpreted(self):
+        """Служебные символы FTS5 в запросе не ломают поиск."""
+        self.assertEqual(self.search('"кости" OR (NEAR'), [])
+        self.assertEqual(self.search('*'), [])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через индекс FTS5."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('admin:posts_post_changelist'),
+                              {'q': 'кош'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}',
+                 group=cls.group if i % 2 else None)
+            for i in range(5)
+        )
+
+    def export(self, user, url, **params):
+        client = Client()
+        client.force_login(user)
+        return client.get(url, params)
+
+    def test_author_exports_own_posts(self):
+        """Автор получает выгрузку своих постов потоком JSONL."""
+        url = reverse('posts:profile_export',
+                      kwargs={'username': self.author.username})
+        response = self.export(self.author, url)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]['text'], 'Пост 4')
+        self.assertEqual(records[0]['author'], 'author')
+        self.assertEqual(self.export(self.other, url).status_code, 403)
+        self.assertEqual(self.export(self.staff, url).status_code, 200)
+
+    def test_group_export_is_staff_only(self):
+        """Выгрузка группы в CSV доступна только персоналу."""
+        url = reverse('posts:group_export', kwargs={'slug': self.group.slug})
+        self.assertEqual(self.export(self.author, url).status_code, 403)
+        response = self.export(self.staff, url, format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(
+            b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], ['id', 'author', 'group', 'text',
+                                   'pub_date'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            self.export(self.staff, url, format='xml').status_code, 404)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='Пост для ленты')
+
+    def test_feeds_list_posts(self):
+        """RSS и Atom ленты главной, группы и автора содержат посты."""
+        for name, kwargs in (
+            ('post_list', {}),
+            ('group_list', {'slug': self.group.slug}),
+            ('profile', {'username': self.user.username}),
+        ):
+            for kind in ('rss', 'atom'):
+                with self.subTest(name=name, kind=kind):
+                    response = self.client.get(
+                        reverse(f'posts:{name}_{kind}', kwargs=kwargs))
+                    self.assertContains(response, 'Пост для ленты')
+                    self.assertTrue(response.has_header('ETag'))
+                    self.assertTrue(response.has_header('Last-Modified'))
+                    # Ключи те же, что у страницы ленты и её валидаторов.
+                    page = self.client.get(
+                        reverse(f'posts:{name}', kwargs=kwargs))
+                    self.assertEqual(response['Surrogate-Key'],
+                                     page['Surrogate-Key'])
+        response = self.client.get(
+            reverse('posts:group_list_rss', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_rendered(self):
+        """Неизменившаяся лента отвечает 304 одним агрегатным запросом."""
+        url = reverse('posts:group_list_rss', kwargs={'slug': 'group'})
+        response = self.client.get(url)
+        with QueryRecorder() as queries:
+            cached = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('MAX', queries.queries[0]['sql'])
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+        Post.objects.create(author=self.user, group=self.group,
+                            text='Свежий пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Свежий пост')
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class ConditionalPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+
+    def setUp(self):
+        self.post = Post.objects.create(author=self.user, group=self.group,
+                                        text='Пост')
+        self.detail = reverse('posts:post_detail',
+                              kwargs={'post_id': self.post.pk})
+
+    def test_unchanged_post_is_not_rendered(self):
+        """Совпавший ETag поста даёт 304 без отрисовки шаблона."""
+        response = self.client.get(self.detail)
+        self.assertTrue(response.has_header('Last-Modified'))
+        with QueryRecorder() as queries:
+            cached = self.client.get(
+                self.detail, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.templates, [])
+        self.assertEqual(len(queries), 1)
+
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.client.get(self.detail,
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Исправленный пост')
+        missing = reverse('posts:post_detail', kwargs={'post_id': 0})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_validators_follow_feed_changes(self):
+        """ETag ленты меняется при удалении поста и правке группы."""
+        url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        extra = Post.objects.create(author=self.user, group=self.group,
+                                    text='Ещё пост')
+        etag = self.client.get(url)['ETag']
+        extra.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.group.title = 'Переименованная группа'
+        self.group.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Переименованная группа')
+
+    def backdate(self):
+        """Сдвигает изменения в прошлое: Last-Modified точен до секунды."""
+        Post.objects.update(updated=timezone.now() - timedelta(hours=1))
+        cache.clear()
+
+    def test_last_modified_follows_delete(self):
+        """Удалённый пост не остаётся у клиента по If-Modified-Since."""
+        url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        extra = Post.objects.create(author=self.user, group=self.group,
+                                    text='Ещё пост')
+        self.backdate()
+        modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+        extra.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Ещё пост')
+
+    def test_last_modified_follows_group_rename(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        self.backdate()
+        modified = self.client.get(url)['Last-Modified']
+        self.group.title = 'Переименованная группа'
+        self.group.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertContains(response, 'Переименованная группа')
+
+    def test_author_rename_refreshes_feeds(self):
+        """Новое имя автора видно в лентах, а не только в профиле."""
+        urls = [reverse('posts:post_list'),
+                reverse('posts:group_list', kwargs={'slug': 'group'}),
+                self.detail]
+        self.backdate()
+        updated = Post.objects.get(pk=self.post.pk).updated
+        validators = {url: self.client.get(url) for url in urls}
+        with self.assertNumQueries(1):
+            # Вход сохраняет только last_login: ни чтения, ни сброса.
+            self.user.save(update_fields=['last_login'])
+        self.user.first_name, self.user.last_name = 'Новое', 'Имя'
+        self.user.save()
+        for url, previous in validators.items():
+            for header, value in (
+                    ('HTTP_IF_NONE_MATCH', previous['ETag']),
+                    ('HTTP_IF_MODIFIED_SINCE', previous['Last-Modified'])):
+                with self.subTest(url=url, header=header):
+                    response = self.client.get(url, **{header: value})
+                    self.assertContains(response, 'Новое Имя')
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated, updated)
+
+    def test_user_state_is_part_of_etag(self):
+        """Страница пользователя не совпадает с анонимной версией."""
+        url = reverse('posts:post_list')
+        anonymous = self.client.get(url)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304)
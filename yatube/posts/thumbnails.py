@@ -0,0 +1,171 @@
+"""Миниатюры картинок постов.
+
+Размеры для лент и страницы поста заданы в PRESETS. Миниатюры готовятся
+после загрузки картинки пулом процессов: уменьшение картинки упирается
+в процессор, и в потоке сайта оно задерживало бы ответы. Страница
+никогда не ждёт миниатюру: пока её нет, показывается исходная картинка.
+
+Записи о готовых миниатюрах sorl-thumbnail хранит в своём хранилище
+ключ-значение (кеш и таблица thumbnail_kvstore). Для страницы ленты они
+читаются одним cache.get_many и одним запросом к базе на недостающие,
+а не по запросу на пост.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+logger = logging.getLogger('yatube.thumbnails')
+
+# Имя размера -> (геометрия, параметры sorl-thumbnail).
+PRESETS = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('960', {'upscale': False}),
+}
+
+backend = ThumbnailBackend()
+_executor = None
+
+
+def thumbnail_file(name, preset):
+    """Геометрия, параметры и ImageFile миниатюры картинки name.
+
+    Параметры дополняются так же, как в ThumbnailBackend.get_thumbnail,
+    поэтому имя файла совпадает с тем, что выдал бы тег {% thumbnail %}.
+    """
+    source = ImageFile(name)
+    geometry, options = PRESETS[preset]
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    filename = backend._get_thumbnail_filename(source, geometry, options)
+    return geometry, options, ImageFile(filename, default.storage)
+
+
+def render(name):
+    """Создаёт все миниатюры картинки name. Выполняется в пуле процессов.
+
+    Обращается только к хранилищу файлов: записи о миниатюрах делает
+    процесс сайта (store), чтобы воркерам не нужна была база.
+    """
+    source = ImageFile(name)
+    source_image = default.engine.get_image(source)
+    try:
+        source.set_size(default.engine.get_image_size(source_image))
+        rendered = []
+        for preset in PRESETS:
+            geometry, options, thumbnail = thumbnail_file(name, preset)
+            if thumbnail.exists():
+                thumbnail.set_size()
+            else:
+                options['image_info'] = default.engine.get_image_info(
+                    source_image)
+                backend._create_thumbnail(source_image, geometry, options,
+                                          thumbnail)
+            rendered.append(thumbnail.serialize())
+    finally:
+        default.engine.cleanup(source_image)
+    return source.serialize(), rendered
+
+
+def store(post_id, result):
+    """Записывает готовые миниатюры и обновляет страницы с постом."""
+    from .models import Post
+
+    source, thumbnails = result
+    source = deserialize_image_file(source)
+    default.kvstore.get_or_set(source)
+    for thumbnail in thumbnails:
+        default.kvstore.set(deserialize_image_file(thumbnail), source)
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image.name == source.name:
+        # Страницы с постом закешированы с исходной картинкой: сохранение
+        # сбрасывает их кеш так же, как правка поста.
+        post.save(update_fields=['updated'])
+
+
+def _done(post_id, future):
+    # Вызывается в служебном потоке пула: соединения с базой этого потока
+    # закрываются сразу, иначе они остались бы открытыми навсегда.
+    try:
+        store(post_id, future.result())
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры поста %s',
+                         post_id)
+    finally:
+        close_old_connections()
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def schedule(post):
+    """Ставит подготовку миниатюр поста в очередь после коммита."""
+    post_id, name = post.pk, post.image.name
+
+    def submit():
+        if not settings.THUMBNAIL_WORKERS:
+            return store(post_id, render(name))
+        executor().submit(render, name).add_done_callback(
+            partial(_done, post_id))
+
+    transaction.on_commit(submit)
+
+
+def is_ready(name):
+    """Готовы ли все миниатюры картинки name."""
+    return all(default.kvstore.get(thumbnail_file(name, preset)[2])
+               for preset in PRESETS)
+
+
+def lookup(images, preset):
+    """Готовые миниатюры размера preset: {имя картинки: ImageFile}.
+
+    Картинки без готовой миниатюры в ответ не попадают.
+    """
+    keys = {
+        add_prefix(thumbnail_file(image, preset)[2].key): image
+        for image in images
+    }
+    kvstore = default.kvstore
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStore.objects.filter(key__in=missing)
+                     .values_list('key', 'value'))
+        kvstore.cache.set_many(found, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items()
+        if isinstance(value, str)
+    }
+
+
+def attach(posts, preset):
+    """Проставляет постам атрибут thumbnail: миниатюру размера preset,
+    исходную картинку, пока миниатюры нет, или None без картинки."""
+    posts = list(posts)
+    ready = lookup([post.image.name for post in posts if post.image], preset)
+    for post in posts:
+        post.thumbnail = (ready.get(post.image.name, post.image)
+                          if post.image else None)
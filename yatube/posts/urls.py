@@ -1,13 +1,32 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'index'
 
 urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/export/', views.group_export,
+         name='group_export'),
+    path('group/<slug:slug>/rss/', feeds.conditional(feeds.GroupPostsFeed()),
+         name='group_list_rss'),
+    path('group/<slug:slug>/atom/',
+         feeds.conditional(feeds.GroupPostsAtomFeed()),
+         name='group_list_atom'),
     path('', views.index, name='post_list'),
+    path('rss/', feeds.conditional(feeds.LatestPostsFeed()),
+         name='post_list_rss'),
+    path('atom/', feeds.conditional(feeds.LatestPostsAtomFeed()),
+         name='post_list_atom'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/export/', views.profile_export,
+         name='profile_export'),
+    path('profile/<str:username>/rss/',
+         feeds.conditional(feeds.AuthorPostsFeed()), name='profile_rss'),
+    path('profile/<str:username>/atom/',
+         feeds.conditional(feeds.AuthorPostsAtomFeed()),
+         name='profile_atom'),
+    path('search/', views.search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
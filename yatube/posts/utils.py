@@ -1,7 +1,227 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+from collections.abc import Sequence
 
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
-def paginator_func(obj, settings, page):
+
+def paginator_func(obj, settings, page, count=None):
     paginator = Paginator(obj, settings)
+    if count is not None:
+        # Готовое значение счётчика заменяет SELECT COUNT(*).
+        paginator.count = count
     page_obj = paginator.get_page(page)
     return page_obj
+
+
+def encode_cursor(post):
+    """Кодирует ключ (pub_date, id) поста в непрозрачную строку для URL.
+
+    Пост может быть и моделью, и словарём из QuerySet.values().
+    """
+    if isinstance(post, dict):
+        pub_date, pk = post['pub_date'], post['id']
+    else:
+        pub_date, pk = post.pub_date, post.pk
+    raw = json.dumps([pub_date.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; для испорченного курсора возвращает None."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        pub_date, pk = json.loads(base64.urlsafe_b64decode(padded))
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CountlessPage(Page):
+    """Страница без подсчёта записей.
+
+    Выбирается на одну строку больше размера страницы: лишняя строка
+    говорит о том, что следующая страница существует.
+    """
+
+    def __init__(self, paginator, number):
+        self.paginator = paginator
+        self.number = number
+
+    def __repr__(self):
+        return f'<Page {self.number}>'
+
+    @cached_property
+    def _rows(self):
+        per_page = self.paginator.per_page
+        bottom = (self.number - 1) * per_page
+        return list(self.paginator.object_list[bottom:bottom + per_page + 1])
+
+    @property
+    def object_list(self):
+        return self._rows[:self.paginator.per_page]
+
+    def has_next(self):
+        return len(self._rows) > self.paginator.per_page
+
+    def has_previous(self):
+        return self.number > 1
+
+    def start_index(self):
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CountlessPaginator(Paginator):
+    """Пагинатор по номерам страниц, который никогда не выполняет COUNT(*).
+
+    Общее число записей и страниц неизвестно: count и num_pages равны None.
+    """
+
+    @property
+    def count(self):
+        return None
+
+    @property
+    def num_pages(self):
+        return None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return 1
+        return max(number, 1)
+
+    def page(self, number):
+        return CountlessPage(self, self.validate_number(number))
+
+    def get_page(self, number):
+        return self.page(number)
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации.
+
+    Строки выбираются лениво, с запасом в одну запись: она показывает,
+    есть ли страница дальше, без COUNT(*) и без OFFSET. Номеров у таких
+    страниц нет, поэтому это не django.core.paginator.Page: соседние
+    страницы адресуются курсорами next_cursor и previous_cursor.
+    """
+
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self.after = after
+        self.before = before
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @cached_property
+    def _window(self):
+        per_page = self.paginator.per_page
+        posts = self.paginator.object_list
+        if self.before is not None:
+            pub_date, pk = self.before
+            rows = list(posts.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            ).reverse()[:per_page + 1])
+            has_more = len(rows) > per_page
+            return rows[:per_page][::-1], True, has_more
+        if self.after is not None:
+            pub_date, pk = self.after
+            posts = posts.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        rows = list(posts[:per_page + 1])
+        has_more = len(rows) > per_page
+        return rows[:per_page], has_more, self.after is not None
+
+    @property
+    def object_list(self):
+        return self._window[0]
+
+    def has_next(self):
+        return self._window[1] and bool(self.object_list)
+
+    def has_previous(self):
+        return self._window[2] and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id).
+
+    Следующая страница выбирается условием «строго после курсора»
+    по индексу, поэтому тысячная страница стоит столько же, сколько первая.
+    """
+    template_name = 'posts/includes/cursor_paginator.html'
+    ordering = ('-pub_date', '-id')
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    @property
+    def count(self):
+        return None
+
+    @property
+    def num_pages(self):
+        return None
+
+    def get_page(self, after=None, before=None):
+        before = decode_cursor(before)
+        after = decode_cursor(after) if before is None else None
+        return CursorPage(self, after=after, before=before)
+
+
+def paginate_posts(request, posts, count=None):
+    """Выбирает страницу ленты в режиме settings.POSTS_PAGINATION.
+
+    count — известное заранее число постов ленты (денормализованный
+    счётчик); пагинатор по номерам страниц использует его вместо COUNT(*).
+    """
+    if settings.POSTS_PAGINATION == 'countless':
+        paginator = CountlessPaginator(posts, settings.POSTS_PAGE)
+        return paginator.get_page(request.GET.get('page'))
+    if settings.POSTS_PAGINATION == 'cursor':
+        paginator = CursorPaginator(posts, settings.POSTS_PAGE)
+        return paginator.get_page(request.GET.get('after'),
+                                  request.GET.get('before'))
+    return paginator_func(posts,
+                          settings.POSTS_PAGE,
+                          request.GET.get('page'),
+                          count)
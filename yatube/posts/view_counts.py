@@ -0,0 +1,118 @@
+"""Счётчики просмотров постов без записи в базу на каждый просмотр.
+
+Просмотры копятся в памяти процесса и раз в VIEW_COUNT_FLUSH_SECONDS
+сбрасываются фоновым потоком: один UPDATE с CASE на пачку постов
+прибавляет накопленные приращения к Post.views. Поэтому читатели не
+встают в очередь за блокировкой записи SQLite, а при падении процесса
+теряется не больше одного интервала просмотров. При остановке процесса
+остаток сбрасывается через atexit.
+
+Страницы поста из кеша страниц и ответы 304 тоже считаются просмотрами:
+их учитывает приёмник сигнала page_cache_hit и обёртка counts_views.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger('yatube.view_counts')
+
+# Постов в одном UPDATE: держит число параметров запроса в пределах
+# ограничения SQLite (999 в старых версиях).
+BATCH_SIZE = 300
+
+
+class ViewCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = Counter()
+        self.thread = None
+
+    def record(self, post_id):
+        with self.lock:
+            self.deltas[post_id] += 1
+            # При VIEW_COUNT_FLUSH_SECONDS = 0 (так в тестах) поток
+            # не запускается: только явный сброс.
+            if self.thread is None and settings.VIEW_COUNT_FLUSH_SECONDS:
+                self.thread = threading.Thread(
+                    target=self.run, name='view-counts', daemon=True)
+                self.thread.start()
+                atexit.register(self.flush_on_exit)
+
+    def pending(self, post_id):
+        """Просмотры поста, ещё не сброшенные в базу этим процессом."""
+        with self.lock:
+            return self.deltas[post_id]
+
+    def take(self):
+        with self.lock:
+            deltas, self.deltas = self.deltas, Counter()
+        return deltas
+
+    def flush(self):
+        """Прибавляет накопленные просмотры к постам; возвращает их число.
+
+        Если запись не удалась, приращения возвращаются в буфер и уйдут
+        со следующим сбросом.
+        """
+        from .models import Post
+
+        deltas = self.take()
+        items = sorted(deltas.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            increment = Case(
+                *(When(pk=pk, then=Value(delta)) for pk, delta in batch),
+                output_field=IntegerField(),
+            )
+            try:
+                Post.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                    views=F('views') + increment)
+            except Exception:
+                with self.lock:
+                    self.deltas.update(dict(items[start:]))
+                raise
+        return sum(deltas.values())
+
+    def run(self):
+        while True:
+            time.sleep(settings.VIEW_COUNT_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Не удалось сбросить счётчики просмотров')
+            finally:
+                close_old_connections()
+
+    def flush_on_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Просмотры при остановке процесса не сохранены')
+
+
+counter = ViewCounter()
+record = counter.record
+pending = counter.pending
+flush = counter.flush
+
+
+def counts_views(view):
+    """Учитывает просмотр поста post_id, в том числе ответом 304.
+
+    Ставится над conditional_page: условный ответ возвращается,
+    не вызывая само представление.
+    """
+    @wraps(view)
+    def wrapper(request, post_id, *args, **kwargs):
+        response = view(request, post_id, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            record(int(post_id))
+        return response
+    return wrapper
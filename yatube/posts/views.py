@@ -1,54 +1,114 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.middleware.page_cache import add_surrogate_keys
+from core.queries import query_budget
+from core.ratelimit import ratelimit
+
+from . import export, view_counts
+from .cache import feed_cache, feed_surrogate_keys, post_surrogate_keys
+from .conditional import conditional_page, feed_state, post_state
 from .forms import PostForm
-from .models import Group, Post, User
-from .utils import paginator_func
+from .models import AuthorStats, Group, Post, User
+from .search import search_posts
+from .utils import paginate_posts, paginator_func
+
+
+def author_post_count(author):
+    try:
+        return author.stats.post_count
+    except AuthorStats.DoesNotExist:
+        return 0
 
 
+@query_budget(6)
+@conditional_page(feed_state)
 def index(request):
-    posts = Post.objects.all()
-    page_obj = paginator_func(posts,
-                              settings.POSTS_PAGE,
-                              request.GET.get('page'))
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = paginate_posts(request, posts)
+    context = {
+        'page_obj': page_obj,
+        'feed_cache': feed_cache(request, 'global'),
+    }
+    response = render(request, 'posts/index.html', context)
+    return add_surrogate_keys(response, *feed_surrogate_keys())
 
 
+@query_budget(6)
+@conditional_page(feed_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
-    page_obj = paginator_func(posts,
-                              settings.POSTS_PAGE,
-                              request.GET.get('page'))
+    posts = Post.objects.filter(group=group).select_related('author')
+    page_obj = paginate_posts(request, posts, group.post_count)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_cache': feed_cache(request, f'group:{group.slug}'),
     }
-    return render(request, 'posts/group_list.html', context)
+    response = render(request, 'posts/group_list.html', context)
+    return add_surrogate_keys(
+        response, *feed_surrogate_keys(group_id=group.pk))
 
 
+@query_budget(6)
+@conditional_page(feed_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    post_count = author_post_count(author)
+    posts = author.posts.select_related('group')
+    page_obj = paginate_posts(request, posts, post_count)
+    context = {
+        'page_obj': page_obj,
+        'author': author,
+        'post_count': post_count,
+        'feed_cache': feed_cache(request, f'author:{author.pk}'),
+    }
+    response = render(request, 'posts/profile.html', context)
+    return add_surrogate_keys(
+        response, *feed_surrogate_keys(author_id=author.pk))
+
+
+@query_budget(5)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(
+        Post.objects.select_related('author', 'group'), query)
     page_obj = paginator_func(posts,
                               settings.POSTS_PAGE,
                               request.GET.get('page'))
     context = {
+        'query': query,
         'page_obj': page_obj,
-        'author': author,
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(request, 'posts/search.html', context)
+    return add_surrogate_keys(response, 'index')
 
 
+@view_counts.counts_views
+@query_budget(5)
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    return render(request, 'posts/post_detail.html', {'post': post})
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    context = {
+        'post': post,
+        'post_count': author_post_count(post.author),
+    }
+    response = render(request, 'posts/post_detail.html', context)
+    return add_surrogate_keys(response, *post_surrogate_keys(
+        post.pk, post.author_id, post.group_id))
 
 
+@query_budget(15)
 @login_required
+@ratelimit('post_create')
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -57,20 +117,49 @@ def post_create(request):
     return render(request, 'posts/create_post.html', {'form': form})
 
 
+@query_budget(15)
 @login_required
+@ratelimit('post_edit')
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    form = PostForm(request.POST or None, instance=post)
-    if request.method == "POST":
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+    if post.author != request.user:
+        return redirect('posts:post_detail', post_id)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
+    if request.method == 'POST' and form.is_valid():
+        form.save()
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
         'is_edit': True,
     }
+    return render(request, 'posts/create_post.html', context)
 
-    if post.author == request.user:
-        return render(request, 'posts/create_post.html', context)
-    return redirect('posts:post_detail', post_id)
+
+def export_response(request, posts, name):
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in export.FORMATS:
+        raise Http404('Неизвестный формат выгрузки')
+    content_type, _ = export.FORMATS[file_format]
+    response = StreamingHttpResponse(export.render(posts, file_format),
+                                     content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{file_format}"')
+    return response
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user and not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(request, author.posts.all(), f'posts-{username}')
+
+
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(request, Post.objects.filter(group=group),
+                           f'posts-{slug}')
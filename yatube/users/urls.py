@@ -1,4 +1,4 @@
-from django.contrib.auth.views import LoginView, LogoutView
+from django.contrib.auth.views import LogoutView
 from django.urls import path
 
 from . import views
@@ -12,11 +12,7 @@ urlpatterns = [
         name='logout'
     ),
     path('signup/', views.SignUp.as_view(), name='signup'),
-    path(
-        'login/',
-        LoginView.as_view(template_name='users/login.html'),
-        name='login'
-    ),
+    path('login/', views.Login.as_view(), name='login'),
     path(
         'password_change/',
         views.ChangePassword.as_view(),
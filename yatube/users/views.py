@@ -1,17 +1,26 @@
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
-from django.contrib.auth.views import (PasswordChangeView,
+from django.utils.decorators import method_decorator
+from django.contrib.auth.views import (LoginView, PasswordChangeView,
                                        PasswordChangeDoneView)
 
+from core.ratelimit import ratelimit
+
 from .forms import CreationForm, PasswordChange
 
 
+@method_decorator(ratelimit('signup'), name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('index:post_list')
     template_name = 'users/signup.html'
 
 
+@method_decorator(ratelimit('login'), name='dispatch')
+class Login(LoginView):
+    template_name = 'users/login.html'
+
+
 class ChangePassword(PasswordChangeView):
     form_class = PasswordChange
     success_url = reverse_lazy('users:password_change_done')
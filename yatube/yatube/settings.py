@@ -40,6 +40,10 @@ LOGIN_REDIRECT_URL = 'posts:post_list'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 POSTS_PAGE = 10
+# Режим пагинации лент: 'page' — номера страниц (OFFSET),
+# 'countless' — номера страниц без COUNT(*),
+# 'cursor' — курсор по (pub_date, id), глубина страницы не влияет на цену.
+POSTS_PAGINATION = 'page'
 # Application definition
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
@@ -48,29 +52,43 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.metrics.MetricsMiddleware',
+    'core.middleware.queries.RepeatedQueriesMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.static.PrecompressedStaticMiddleware',
+    'core.middleware.page_cache.AnonymousPageCacheMiddleware',
+    'core.middleware.admission.AdmissionControlMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.replicas.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.memory.MemoryTraceMiddleware',
+    'core.middleware.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
+
+# Тесты запускаются со своими настройками и временным MEDIA_ROOT
+# (core.testing).
+TEST_RUNNER = 'core.testing.TestRunner'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -95,9 +113,102 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # SQLite пускает одного писателя: конкурирующие запросы ждут
+        # блокировку до timeout секунд, а не падают сразу.
+        'OPTIONS': {'timeout': 20},
     }
 }
 
+# Реплики только для чтения. Локально их заводит переменная окружения
+# YATUBE_REPLICAS=<число>, а наполняет копиями основной базы команда
+# sync_replicas: интервал между копиями имитирует отставание реплик.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('YATUBE_REPLICAS', 0)) + 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+
+# Метрики по представлениям (/metrics). При нескольких процессах каждый
+# сбрасывает снимок в METRICS_DIR раз в METRICS_FLUSH_SECONDS, и /metrics
+# складывает снимки всех воркеров; None — только метрики своего процесса.
+METRICS_DIR = None
+METRICS_FLUSH_SECONDS = 5
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Контроль нагрузки (core.middleware.admission): сколько запросов
+# каждого класса процесс обрабатывает одновременно. Классы задаются
+# именами маршрутов или пространствами имён; запросы с изменением данных
+# (POST и т. п.) — всегда класс 'writes'. Лимит 0 или отсутствие класса
+# в ADMISSION_LIMITS снимает ограничение. Сверх лимита запрос ждёт
+# ADMISSION_QUEUE_SECONDS и получает 503 с Retry-After.
+ADMISSION_CLASSES = {
+    'feeds': (
+        'posts:post_list', 'posts:group_list', 'posts:profile',
+        'posts:search', 'posts:post_list_rss', 'posts:post_list_atom',
+        'posts:group_list_rss', 'posts:group_list_atom',
+        'posts:profile_rss', 'posts:profile_atom', 'posts:group_export',
+        'posts:profile_export', 'api:post_list', 'api:group_posts',
+        'api:profile',
+    ),
+    'detail': ('posts:post_detail', 'api:post_detail', 'api:post_views'),
+    'admin': ('admin', 'profiles', 'profile_download'),
+}
+ADMISSION_LIMITS = {'feeds': 8, 'detail': 16, 'writes': 2, 'admin': 2}
+ADMISSION_QUEUE_SECONDS = 0.5
+ADMISSION_RETRY_AFTER = 2
+
+# Сколько одинаковых по форме SQL-запросов за запрос считать N+1
+# (журнал yatube.queries); 0 — не искать.
+NPLUSONE_THRESHOLD = 5
+# Превышение бюджета запросов (core.queries.query_budget): True — ошибка
+# (так в тестах, см. core.testing), False — предупреждение в журнале.
+QUERY_BUDGET_STRICT = False
+
+# Профилирование запросов (core.profiling): запросы с подписанным
+# заголовком X-Profile и доля PROFILE_SAMPLE_RATE случайных запросов.
+# Снимки смотрят сотрудники на /admin/profiles/; None отключает запись.
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_SAMPLE_RATE = 0
+PROFILE_KEEP = 200
+PROFILE_LIST_SIZE = 20
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+# Замер памяти запросов через tracemalloc (core.memory): доля
+# MEMORY_TRACE_SAMPLE_RATE запросов к маршрутам или пространствам имён
+# из MEMORY_TRACE_VIEWS. Отчёт по замерам — manage.py memory_report.
+MEMORY_TRACE_DIR = os.path.join(BASE_DIR, 'memory')
+MEMORY_TRACE_VIEWS = ('posts', 'users')
+MEMORY_TRACE_SAMPLE_RATE = 0
+# Глубина стека на выделение и сколько мест сохранять на запрос.
+MEMORY_TRACE_FRAMES = 1
+MEMORY_TRACE_SITES = 15
+
+
+# Cache
+# Версии кеша лент должны быть общими для всех процессов, поэтому при
+# нескольких воркерах здесь нужен разделяемый бэкенд (memcached, redis).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сколько секунд живёт закешированный фрагмент ленты.
+FEED_CACHE_TIMEOUT = 60
+# Сколько секунд живёт страница в кеше для анонимных посетителей;
+# 0 отключает кеш страниц.
+PAGE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -136,3 +247,32 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# Сюда collectstatic собирает статику: с хешами в именах и копиями .gz
+# (core.storage). Собранные файлы раздаёт core.middleware.static.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Сколько секунд кешировать статику без хеша в имени.
+STATIC_MAX_AGE = 60 * 60
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+
+# Миниатюры картинок постов (posts.thumbnails) готовятся заранее пулом
+# из THUMBNAIL_WORKERS процессов после загрузки; 0 — готовить сразу
+# в процессе сайта.
+THUMBNAIL_WORKERS = 2
+
+# Раз в сколько секунд просмотры постов, накопленные в памяти процесса,
+# записываются в базу (posts.view_counts); при падении процесса теряется
+# не больше этого интервала. 0 — только явный сброс view_counts.flush().
+VIEW_COUNT_FLUSH_SECONDS = 10
+
+# Лимиты частоты POST-запросов (core.ratelimit): область -> пары
+# (ключ 'user' или 'ip', 'число/период'). Счётчики лежат в кеше.
+RATELIMITS = {
+    'post_create': (('user', '10/m'), ('ip', '60/m')),
+    'post_edit': (('user', '30/m'), ('ip', '120/m')),
+    'login': (('ip', '10/m'),),
+    'signup': (('ip', '5/h'),),
+}